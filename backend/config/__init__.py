@@ -17,6 +17,17 @@ LASTEST_VERSION = ConfigVersionCls(major = ConfOptWrapper(2),
                                    phase = ConfOptWrapper("indev"))
 CONFIG = RootConfigCls.from_dict({})
 
+# $ Called with the new config whenever find_config() loads one
+_RELOAD_HOOKS: list[typing.Callable[[RootConfigCls], None]] = []
+
+def register_reload_hook(hook: typing.Callable[[RootConfigCls], None]) -> None:
+    """Register a callback for when `find_config()` loads a new config.
+
+    Used by modules that cache things derived from a config (like the
+    lexer's token pattern tables) to drop them.
+    """
+    _RELOAD_HOOKS.append(hook)
+
 def _find_subschema(ref, defs: dict):
     if not isinstance(ref, str):
         return _SENTINEL
@@ -107,4 +118,7 @@ def find_config(current_path: pathlib.Path | None = None):
         config.update(c_)
 
     global CONFIG
-    return (CONFIG := RootConfigCls.from_dict(config))
\ No newline at end of file
+    CONFIG = RootConfigCls.from_dict(config)
+    for hook in _RELOAD_HOOKS:
+        hook(CONFIG)
+    return CONFIG
\ No newline at end of file
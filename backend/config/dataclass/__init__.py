@@ -6,7 +6,7 @@ from dataclasses import dataclass, fields, is_dataclass
 
 
 from backend import errors
-from backend.config.dataclass.bases import CustomConfDatacls, ConfOptWrapper, _UNFILLED
+from backend.config.dataclass.bases import CustomConfDatacls, ConfOptWrapper, _UNFILLED, option_value
 
 from backend.config.dataclass.customization import (
     CustomizationConfigCls,
@@ -58,8 +58,21 @@ class ConfOptWrapper[T](ConfigDescriptorProtocol[T]):
     def __bool__(self):
         return bool(self.get())
 
+def option_value[T](option: ConfOptWrapper[T] | T) -> T:
+    """The value of a config option, as `from_dict()` stores explicitly set options unwrapped."""
+    if isinstance(option, ConfOptWrapper):
+        return option.get()
+    return option
+
 _MUTABLE_TYPES: dict[type, typing.Callable[[typing.Any], typing.Any]] = {list: tuple}
 
+def _freeze(value: typing.Any) -> typing.Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(i) for i in value)
+    if isinstance(value, dict):
+        return tuple((k, _freeze(v)) for k, v in value.items())
+    return value
+
 class CustomConfDatacls:
     """A custom wrapper for all config dataclasses.
 
@@ -91,6 +104,31 @@ class CustomConfDatacls:
             self._root_cache = typing.cast(RootConfigCls, c)
         return self._root_cache
 
+    @typing.final
+    def fingerprint(self) -> tuple:
+        """Return a hashable snapshot of every option value in this subtree.
+
+        Two config objects with equal fingerprints configure the exact same
+        behavior, which makes this usable as a cache key.
+        """
+        assert dataclasses.is_dataclass(self)
+        # $ Config objects are frozen, so the snapshot only has to be taken once
+        cached = self.__dict__.get("_fingerprint")
+        if cached is not None:
+            return cached
+        items = []
+        for field in dataclasses.fields(self):
+            value = getattr(self, field.name)
+            if isinstance(value, CustomConfDatacls):
+                value = value.fingerprint()
+            elif isinstance(value, ConfOptWrapper):
+                value = _freeze(value.get())
+            else:
+                value = _freeze(value)
+            items.append((field.name, value))
+        object.__setattr__(self, "_fingerprint", tuple(items))
+        return self._fingerprint
+
     def __post_init__(self) -> None:
         mutable_args: list[str] = getattr(self, "r4cr0q9Vmqd1d8Eb9Emh5pESG2Ts^*", [])
         # & Nothing ever happened...
@@ -4,7 +4,7 @@ import itertools
 import typing
 from dataclasses import dataclass
 
-from backend.config.dataclass.bases import CustomConfDatacls, ConfOptWrapper as C
+from backend.config.dataclass.bases import CustomConfDatacls, ConfOptWrapper as C, option_value
 from backend import errors
 
 if typing.TYPE_CHECKING:
@@ -250,12 +250,12 @@ class StringLiteralsConfigCls(CustomConfDatacls):
         ls = []
         prefixes = []
         for category, _ in self._():
-            if category.accessibility.get().endswith("prefix"):
-                prefixes.append(category.prefix_syntax.get())
-        delis = typing.cast(list[str], list(self.delimeters.get()[:])) # Pyright just smoke some weed today
-        if self.multiline.delimeter_syntax.get() == "triple":
-            if self.multiline.accessibility.get().endswith("delimeter"):
-                delis.extend(dl*3 for dl in self.delimeters.get())
+            if option_value(category.accessibility).endswith("prefix"):
+                prefixes.append(option_value(category.prefix_syntax))
+        delis = typing.cast(list[str], list(option_value(self.delimeters)[:])) # Pyright just smoke some weed today
+        if option_value(self.multiline.delimeter_syntax) == "triple":
+            if option_value(self.multiline.accessibility).endswith("delimeter"):
+                delis.extend(dl*3 for dl in option_value(self.delimeters))
         for n in range(len(prefixes) + 1):
             for perm in itertools.permutations(prefixes, n):
                 ls.extend(
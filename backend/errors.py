@@ -32,6 +32,12 @@ class AttributeError(SapphireError):
 class SyntaxError(SapphireError):
     _default_msg = "Invalid syntax"
 
+class IncompleteInputError(SyntaxError):
+    """
+    Thrown when the source ends in the middle of a token, like an unterminated string literal.
+    """
+    pass
+
 class VariableError(SapphireError):
     pass
 
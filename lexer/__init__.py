@@ -1,13 +1,13 @@
 import typing
 from collections import abc
 
-# Creating the files
-from lexer.meta import itt, token_types
-itt.write_file()
-token_types.write_file()
+# Creating the files (only when what they're generated from has changed)
+from lexer.meta import ensure_generated
+ensure_generated()
 
 from lexer.lexer import Tokenizer, Token
 from lexer.strings import StringSubLexer, StrToken, FormattedValue
+from lexer.token_buffer import TokenBuffer
 from lexer.internal_token_types import *
 from lexer.token_types import *
 
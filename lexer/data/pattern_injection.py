@@ -3,19 +3,22 @@ from backend import errors
 import typing
 import regex
 
-from backend.config import CONFIG
-
-cus = CONFIG.customization
+from backend.config import RootConfigCls, option_value
+from lexer.internal_token_types import ITTTypeChecking
 
 @dataclasses.dataclass
 class StringTokenPattern:
     pattern: str
     associated_type: tuple[str, ...]
+    # $ The resolved associated type, filled in by TokenPatternTable.build()
+    kind: ITTTypeChecking | None = dataclasses.field(default = None, compare = False, repr = False)
 
 @dataclasses.dataclass
 class RegExTokenPattern:
     pattern: regex.Pattern
     associated_type: tuple[str, ...]
+    # $ The resolved associated type, filled in by TokenPatternTable.build()
+    kind: ITTTypeChecking | None = dataclasses.field(default = None, compare = False, repr = False)
     def __post_init__(self):
         if isinstance(self.pattern, str):
             self.pattern = regex.compile(self.pattern)
@@ -24,13 +27,13 @@ class RegExTokenPattern:
 S = typing.TypeVar("S", bound = list[StringTokenPattern])
 R = typing.TypeVar("R", bound = list[RegExTokenPattern])
 
-def _booleans(plains: S, regexes: R) -> tuple[S, R]:
-    bool_conf = cus.literals.booleans
+def _booleans(plains: S, regexes: R, conf: RootConfigCls) -> tuple[S, R]:
+    bool_conf = conf.customization.literals.booleans
     # ^ Booleans
-    if bool_conf.enabled.get():
-        true = bool_conf.syntax.true.get()
-        false = bool_conf.syntax.false.get()
-        if bool_conf.case_insensivity.get():
+    if option_value(bool_conf.enabled):
+        true = option_value(bool_conf.syntax.true)
+        false = option_value(bool_conf.syntax.false)
+        if option_value(bool_conf.case_insensivity):
             regexes.append(RegExTokenPattern(
                 regex.compile(f"({true}|{false})", regex.IGNORECASE),
                 ("Primitives", "Boolean")
@@ -40,11 +43,11 @@ def _booleans(plains: S, regexes: R) -> tuple[S, R]:
             plains.append(StringTokenPattern(false, ("Primitives", "Boolean")))
     return plains, regexes
 
-def _null(plains: S, regexes: R) -> tuple[S, R]:
-    null_conf = cus.literals.null
-    if null_conf.enabled.get():
-        null = null_conf.syntax.get()
-        if null_conf.case_insensivity:
+def _null(plains: S, regexes: R, conf: RootConfigCls) -> tuple[S, R]:
+    null_conf = conf.customization.literals.null
+    if option_value(null_conf.enabled):
+        null = option_value(null_conf.syntax)
+        if option_value(null_conf.case_insensivity):
             regexes.append(RegExTokenPattern(
                 regex.compile(null, regex.IGNORECASE),
                 ("Primitives", "Null")
@@ -53,14 +56,14 @@ def _null(plains: S, regexes: R) -> tuple[S, R]:
             plains.append(StringTokenPattern(null, ("Primitives", "Null")))
     return plains, regexes
 
-def _numbers(plains: S, regexes: R) -> tuple[S, R]:
-    nums_conf = cus.literals.numbers
-    if nums_conf.numeric_separator.enabled:
-        separator = nums_conf.numeric_separator.syntax
+def _numbers(plains: S, regexes: R, conf: RootConfigCls) -> tuple[S, R]:
+    nums_conf = conf.customization.literals.numbers
+    if option_value(nums_conf.numeric_separator.enabled):
+        separator = regex.escape(option_value(nums_conf.numeric_separator.syntax))
     else:
         separator = ""
     scientific_regex = rf"(e[\d{separator}]+)?"
-    s = scientific_regex if nums_conf.scientific_notation else ""
+    s = scientific_regex if option_value(nums_conf.scientific_notation) else ""
     
     regexes.append(
         RegExTokenPattern(
@@ -76,28 +79,28 @@ def _numbers(plains: S, regexes: R) -> tuple[S, R]:
     )
 
     # ^ Integers
-    if nums_conf.integer_base_literals.binary:
+    if option_value(nums_conf.integer_base_literals.binary):
         regexes.append(
             RegExTokenPattern(
                 regex.compile(f"0b[01{separator}]+"),
                 ("Primitives", "Int")
             )
         )
-    if nums_conf.integer_base_literals.octal:
+    if option_value(nums_conf.integer_base_literals.octal):
         regexes.append(
             RegExTokenPattern(
                 regex.compile(f"0o[0-7{separator}]+"),
                 ("Primitives", "Int")
             )
         )
-    if nums_conf.integer_base_literals.hexadecimal:
+    if option_value(nums_conf.integer_base_literals.hexadecimal):
         regexes.append(
             RegExTokenPattern(
                 regex.compile(fr"(?i)0x[0-9a-f{separator}]+"),
                 ("Primitives", "Int")
             )
         )
-    if nums_conf.integer_base_literals.binary:
+    if option_value(nums_conf.integer_base_literals.binary):
         regexes.append(
             RegExTokenPattern(
                 regex.compile(fr"[\d{separator}]+"),
@@ -106,8 +109,9 @@ def _numbers(plains: S, regexes: R) -> tuple[S, R]:
         )
     return plains, regexes
 
-def _templates(plains: S, regexes: R) -> tuple[S, R]:
-    if CONFIG.templates.inverted_comparisons != "disabled":
+def _templates(plains: S, regexes: R, conf: RootConfigCls) -> tuple[S, R]:
+    # ? A mode, given as a name, a number or a bool (see templates.schema.json)
+    if option_value(conf.templates.inverted_comparisons) not in ("disabled", 0):
         plains += [
             StringTokenPattern("!<>", ("Templates", "InvertedComparisons", "EqualityWithDiamond")),
             StringTokenPattern("!><", ("Templates", "InvertedComparisons", "EqualityWithInvertedDiamond")),
@@ -118,20 +122,20 @@ def _templates(plains: S, regexes: R) -> tuple[S, R]:
         ]
     return plains, regexes
 
-def _single_line_comments(plains: S, regexes: R) -> tuple[S, R]:
-    ilc = cus.comments.inline_comment
-    if ilc.enabled:
-        space = " " if ilc.space_required else ""
+def _single_line_comments(plains: S, regexes: R, conf: RootConfigCls) -> tuple[S, R]:
+    ilc = conf.customization.comments.inline_comment
+    if option_value(ilc.enabled):
+        space = " " if option_value(ilc.space_required) else ""
         regexes.append(RegExTokenPattern(
-            regex.compile(f"{ilc.syntax}{space}.*"),
+            regex.compile(f"{regex.escape(option_value(ilc.syntax))}{space}.*"),
             ("_SkipPattern",)
         ))
     return plains, regexes
 
-def inject_patterns(p: S, r: R) -> tuple[S, R]:
-    _numbers(p, r)
-    _null(p, r)
-    _booleans(p, r)
-    _templates(p, r)
-    _single_line_comments(p, r)
+def inject_patterns(p: S, r: R, conf: RootConfigCls) -> tuple[S, R]:
+    _numbers(p, r, conf)
+    _null(p, r, conf)
+    _booleans(p, r, conf)
+    _templates(p, r, conf)
+    _single_line_comments(p, r, conf)
     return p, r
\ No newline at end of file
@@ -1,4 +1,11 @@
+from __future__ import annotations
+import dataclasses
+import re
+import typing
 import regex
+from backend import errors
+from backend import config
+from lexer.internal_token_types import InternalTokenType
 from lexer.data.pattern_injection import (
     StringTokenPattern,
     RegExTokenPattern,
@@ -7,6 +14,15 @@ from lexer.data.pattern_injection import (
 
 IDENTIFIER_REGEX = regex.compile(r"[\p{L}_][\p{L}_\d]*")
 
+# $ Flags that can be scoped to a single alternative of the master pattern
+_SCOPED_FLAGS = {
+    regex.IGNORECASE: "i",
+    regex.MULTILINE: "m",
+    regex.DOTALL: "s",
+    regex.VERBOSE: "x",
+}
+_LEADING_INLINE_FLAGS = regex.compile(r"^\(\?[a-zA-Z]+\)")
+
 def _separate_patterns() -> tuple[list[StringTokenPattern], list[RegExTokenPattern]]:
     plain_list, regex_list = [], []
     for i in _default_token_patterns:
@@ -16,31 +32,212 @@ def _separate_patterns() -> tuple[list[StringTokenPattern], list[RegExTokenPatte
             regex_list.append(i)
     return plain_list, regex_list
 
-def get_token_patterns() -> list[StringTokenPattern | RegExTokenPattern]:
-    result = []
-    processed = []
+def get_token_patterns(conf: config.RootConfigCls) -> list[StringTokenPattern | RegExTokenPattern]:
     plains, regexes = _separate_patterns()
 
-    inject_patterns(plains, regexes)
+    inject_patterns(plains, regexes, conf)
+
+    # ? The plain patterns need no particular order, PlainPatternTrie always
+    # ? picks the longest one that matches
+    return plains + regexes
+
+def _is_identifier_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+class PlainPatternTrie:
+    """A prefix trie over the plain-text token patterns.
+
+    `longest_match()` walks the source once, character by character, and
+    returns the longest pattern that matches at the given position.
+    A pattern ending in an identifier character (like `if`) only counts
+    if the character after it is not one as well, so `iffy` is not split
+    into `if` + `fy`.
+    """
+    _TERMINAL = ""
+
+    def __init__(self, patterns: typing.Iterable[StringTokenPattern]):
+        self.root: dict[str, dict] = {}
+        for pattern in patterns:
+            node = self.root
+            for char in pattern.pattern:
+                node = node.setdefault(char, {})
+            # $ Duplicated patterns keep the first definition
+            node.setdefault(self._TERMINAL, pattern)
+
+    def longest_match(self, source: str, pos: int) -> StringTokenPattern | None:
+        node = self.root
+        best = None
+        end = len(source)
+        while pos < end:
+            node = node.get(source[pos])
+            if node is None:
+                break
+            pos += 1
+            pattern = node.get(self._TERMINAL)
+            if pattern is None:
+                continue
+            if (pos < end
+                    and _is_identifier_char(source[pos])
+                    and _is_identifier_char(source[pos - 1])):
+                continue
+            best = pattern
+        return best
+
+def resolve_itt_tuple(tple: tuple[str, ...]) -> InternalTokenType:
+    match tple:
+        case (name, ):
+            return getattr(InternalTokenType, name)
+        case ("Symbols", name):
+            return getattr(InternalTokenType.Symbols, name)
+        case ("Keywords", name):
+            return getattr(InternalTokenType.Keywords, name)
+        case ("Parentheses", name):
+            return getattr(InternalTokenType.Parentheses, name)
+        case ("Primitives", name):
+            return getattr(InternalTokenType.Primitives, name)
+        case ("Templates", category, name):
+            return getattr(
+                getattr(
+                    getattr(InternalTokenType, "Templates"),
+                    category
+                ),
+                name
+            )
+        case _:
+            raise errors.InternalError(
+                "反恐打击非法你的卡覅哦啊就是覅加覅哦按实际覅怕佛都叫哦阿斯顿覅哦啊冰淇淋"
+            )
+
+def _is_known_itt_tuple(tple: tuple[str, ...]) -> bool:
+    try:
+        resolve_itt_tuple(tple)
+    except AttributeError:
+        return False
+    return True
+
+def _to_alternative(token_pattern: StringTokenPattern | RegExTokenPattern) -> str:
+    if isinstance(token_pattern, StringTokenPattern):
+        return regex.escape(token_pattern.pattern)
+    if isinstance(token_pattern, RegExTokenPattern):
+        # ? Global inline flags (e.g. '(?x)') are only valid at the very start of
+        # ? a pattern, so they are turned into a scoped group around the alternative
+        body = _LEADING_INLINE_FLAGS.sub("", token_pattern.pattern.pattern)
+        flags = "".join(
+            letter for flag, letter in _SCOPED_FLAGS.items()
+            if token_pattern.pattern.flags & flag
+        )
+        return f"(?{flags}:{body})"
+    raise errors.InternalError(
+        f"Invalid value found in token_patterns ({token_pattern})"
+    )
+
+def _alternation(patterns: list[StringTokenPattern | RegExTokenPattern]) -> str:
+    return "|".join(
+        f"(?P<_{i}>{_to_alternative(pattern)})"
+        for i, pattern in enumerate(patterns)
+    )
+
+def compile_token_patterns(patterns: list[StringTokenPattern | RegExTokenPattern]) -> regex.Pattern:
+    """Compile the pattern list into a single alternation.
+
+    Each pattern becomes a named group (`_0`, `_1`, ...) in the same order
+    as `patterns`, so the first alternative that matches is the same one
+    the linear walk would have picked, and `match.lastgroup` tells which.
+    """
+    return regex.compile(_alternation(patterns))
+
+# $ Unicode property classes, and what they boil down to on ASCII text
+_ASCII_CLASSES = {
+    r"\p{L}": "a-zA-Z",
+}
+_CLASS_CONTENTS = regex.compile(r"\[(?:\\.|[^\]\\])*\]")
+NON_ASCII_REGEX = re.compile(r"[^\x00-\x7f]")
+
+def compile_ascii_token_patterns(patterns: list[StringTokenPattern | RegExTokenPattern]) -> re.Pattern | None:
+    """Compile the same alternation as `compile_token_patterns()` with the stdlib `re`.
+
+    Unicode property classes (like the `\\p{L}` in `IDENTIFIER_REGEX`) are
+    swapped for their ASCII equivalents, so the result agrees with the
+    full scanner up until it runs into a non-ASCII letter. Returns None
+    if a pattern uses something `re` doesn't support.
+    """
+    def to_ascii(m: regex.Match) -> str:
+        cls = m.group()
+        for unicode_class, ascii_class in _ASCII_CLASSES.items():
+            cls = cls.replace(unicode_class, ascii_class)
+        return cls
+    source = _CLASS_CONTENTS.sub(to_ascii, _alternation(patterns))
+    try:
+        return re.compile(source)
+    except re.error:
+        return None
 
-    # ^ Sort the plain text by prefixes
-    plains_sorted_by_length = sorted(plains, key = lambda x: len(x.pattern))
-    for pattern in plains_sorted_by_length:
-        if pattern in processed:
-            continue
+@dataclasses.dataclass(frozen=True)
+class TokenPatternTable:
+    """Everything the tokenizer needs to match tokens for one config."""
+    patterns: list[StringTokenPattern | RegExTokenPattern]
+    plains: PlainPatternTrie
+    regexes: list[RegExTokenPattern]
+    scanner: regex.Pattern
+    # $ The same scanner for ASCII text, see compile_ascii_token_patterns()
+    ascii_scanner: re.Pattern | None
+    regexes_by_group: dict[str, RegExTokenPattern]
+    # $ The most whitespace-separated words in one plain pattern ('but what about if' is 4)
+    max_words: int
+    # $ Every string literal opener (prefixes included), in the order they're tried
+    string_starts: tuple[str, ...]
+    string_start_chars: frozenset[str]
 
-        related_patterns = filter(
-            lambda p: (p.pattern.startswith(pattern.pattern) 
-                       or pattern.pattern.startswith(p.pattern)),
-            plains
+    @classmethod
+    def build(cls, conf: config.RootConfigCls) -> TokenPatternTable:
+        # $ Patterns of token types that the current aliases never use
+        # $ (e.g. 'else if' when 'elif' is configured) are left out
+        # $ The rest get their type resolved here, once, instead of once per token
+        patterns = [
+            dataclasses.replace(p, kind = resolve_itt_tuple(p.associated_type))
+            for p in get_token_patterns(conf) if _is_known_itt_tuple(p.associated_type)
+        ]
+        string_starts = tuple(conf.customization.literals.strings.get_all_possible_starts())
+        regexes = [p for p in patterns if isinstance(p, RegExTokenPattern)]
+        plains = [p for p in patterns if isinstance(p, StringTokenPattern)]
+        return cls(
+            patterns = patterns,
+            plains = PlainPatternTrie(plains),
+            regexes = regexes,
+            scanner = compile_token_patterns(regexes),
+            ascii_scanner = compile_ascii_token_patterns(regexes),
+            regexes_by_group = {f"_{i}": p for i, p in enumerate(regexes)},
+            max_words = max((len(p.pattern.split()) for p in plains), default = 1),
+            string_starts = string_starts,
+            string_start_chars = frozenset(start[0] for start in string_starts if start)
         )
 
-        related_patterns = sorted(related_patterns, key = lambda x: len(x.pattern))
-        for related in related_patterns:
-            if related not in processed:
-                result.append(related)
-                processed.append(related)
-    return result + regexes
+_TABLE_CACHE: dict[tuple, TokenPatternTable] = {}
+
+def _table_cache_key(conf: config.RootConfigCls) -> tuple:
+    # ? Only the parts of the config that inject_patterns() reads
+    return (
+        conf.customization.literals.fingerprint(),
+        conf.customization.comments.fingerprint(),
+        conf.templates.fingerprint(),
+    )
+
+def get_token_pattern_table(conf: config.RootConfigCls) -> TokenPatternTable:
+    """Return the (cached) token pattern table for `conf`.
+
+    Tables are keyed by a fingerprint of the config options they depend
+    on, so configs with the same options share one table.
+    """
+    key = _table_cache_key(conf)
+    table = _TABLE_CACHE.get(key)
+    if table is None:
+        table = _TABLE_CACHE[key] = TokenPatternTable.build(conf)
+    return table
+
+def clear_token_pattern_cache(*_) -> None:
+    _TABLE_CACHE.clear()
+
+config.register_reload_hook(clear_token_pattern_cache)
 
 _default_token_patterns: list[StringTokenPattern | RegExTokenPattern] = [
     StringTokenPattern("(", ("Parentheses", "OpenParenthesis")),
@@ -1,13 +1,23 @@
 from __future__ import annotations
 import ast
+import bisect
+import codecs
+import io
+import mmap
+import os
+import re
+import sys
 import typing
 import regex
 from backend import errors
 from lexer.token_types import TokenTypeEnum
 from lexer.internal_token_types import InternalTokenType, ITTTypeChecking
-from lexer.strings import Token, StringSubLexer
+from lexer.strings import Token, StrToken, StringSubLexer
+from lexer.token_buffer import TokenBuffer, INTERNED_KINDS
 from lexer.data.patterns import (
-    get_token_patterns,
+    get_token_pattern_table,
+    resolve_itt_tuple,
+    NON_ASCII_REGEX,
     StringTokenPattern,
     RegExTokenPattern,
     )
@@ -20,109 +30,396 @@ TokenTypeSequence: typing.TypeAlias = (
     | typing.MutableSequence[ITTTypeChecking]
     | typing.MutableSet[ITTTypeChecking]
     | typing.MutableSet[TokenTypeEnum]
+    | typing.AbstractSet[ITTTypeChecking]
+    | typing.AbstractSet[TokenTypeEnum]
     | TokenTypeEnum | ITTTypeChecking
 )
+def _read_chunks(path: str | os.PathLike, chunk_size: int, use_mmap: bool) -> typing.Iterator[str]:
+    if not use_mmap:
+        with open(path, encoding = "utf-8") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+        return
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as mm:
+            # ? Same decoding (and newline translation) as reading the file in text mode
+            decoder = io.IncrementalNewlineDecoder(
+                codecs.getincrementaldecoder("utf-8")(), translate = True
+            )
+            for i in range(0, len(mm), chunk_size):
+                if chunk := decoder.decode(mm[i:i + chunk_size]):
+                    yield chunk
+            if chunk := decoder.decode(b"", final = True):
+                yield chunk
+
+class Relexed(typing.NamedTuple):
+    """What `Tokenizer.relex_changes()` changed."""
+    tokens: TokenBuffer
+    # $ Tokens before this index are the previous tokens, untouched
+    start: int
+    # $ The index in the previous tokens from which they were reused (with moved offsets),
+    # $ `len(previous)` when lexing went on to EoF
+    reused: int
+
 class Tokenizer(StringSubLexer):
-    def __init__(self, source: str, conf: config.RootConfigCls | None = None):
+    # $ How many consumed tokens a windowed tokenizer lets pile up before dropping them
+    WINDOW_SLACK: typing.ClassVar[int] = 256
+    # $ How many characters past the current position a streaming tokenizer keeps buffered
+    STREAM_LOOKAHEAD: typing.ClassVar[int] = 1024
+
+    def __init__(self, source: str, conf: config.RootConfigCls | None = None, *,
+                 bulk: bool = False, window: bool = False):
+        """
+        If `bulk` is set, the whole source is tokenized up front into a
+        `TokenBuffer` (see `tokenize_bulk()`), which is then used as the
+        token stream.
+
+        If `window` is set, consumed tokens are dropped once no `save()`
+        checkpoint needs them anymore, so only a bounded window of the
+        token stream is kept alive. Checkpoints must then be handed back
+        with `release()`. Has no effect together with `bulk`.
+        """
         if conf is None:
             conf = config.RootConfigCls()
         self.conf = conf
         self._strs_conf = conf.customization.literals.strings
+        multiline_comment = conf.customization.comments.multiline_comment
+        self._comment_delimiters: tuple[str, str] | None = (
+            (config.option_value(multiline_comment.syntax.start), config.option_value(multiline_comment.syntax.end))
+            if config.option_value(multiline_comment.enabled) else None
+        )
         self.source = source
-        self.src = source[:]
-        self.tokens = []
+        self.pos = 0
+        # $ Streaming (see from_file()): the rest of the source, and where `source` starts in it
+        self._chunks: typing.Iterator[str] | None = None
+        self._chunk_size = 0
+        self._source_offset = 0
+        # $ Offsets of every line start, only built once a position is asked for
+        self._line_starts: list[int] | None = None
+        # $ Lines that were streamed past, and the offset of the line `source` starts in
+        self._dropped_lines = 0
+        self._dropped_line_start = 0
+        self.tokens: list[Token] | TokenBuffer = []
+        # $ token_index and checkpoints are absolute, _base is the absolute index of tokens[0]
         self.token_index = 0
-        self.token_patterns = get_token_patterns()
+        self._base = 0
+        self._window = window and not bulk
+        self._pins: dict[int, int] = {}
+        # $ See from_buffer(): the buffer tokens are read from, and the index of the next one
+        self._buffer: TokenBuffer | None = None
+        self._buffer_index = 0
+        self.pattern_table = get_token_pattern_table(conf)
+        self.token_patterns = self.pattern_table.patterns
+        # $ Where the current run of ASCII text ends, see _ascii_match()
+        self._ascii_end = -1
+        self._string_starts = self.pattern_table.string_starts
+        self._string_start_chars = self.pattern_table.string_start_chars
+        if bulk:
+            self.tokens = self.tokenize_bulk()
 
-    def _emit_token(self, match: str, token_type: TokenTypeEnum | ITTTypeChecking, include_match: bool = True) -> Token:
-        self.src = self.src.lstrip(match)
-        tok = Token(token_type, match if include_match else "")
-        return tok
+    @classmethod
+    def from_file(cls,
+                  path: str | os.PathLike,
+                  conf: config.RootConfigCls | None = None, *,
+                  chunk_size: int = 1 << 16,
+                  use_mmap: bool = False,
+                  window: bool = True) -> Tokenizer:
+        """Tokenize a (UTF-8) file without reading all of it into memory.
+
+        The file is decoded `chunk_size` characters (or bytes, with
+        `use_mmap`) at a time, and `source` only holds the text from the
+        token being lexed onwards. Offsets (token starts, `line_col()`)
+        still count from the start of the file, while `remaining()` and
+        `consumed()` only see what's currently buffered.
+        """
+        self = cls("", conf, window = window)
+        self._chunks = _read_chunks(path, chunk_size, use_mmap)
+        self._chunk_size = chunk_size
+        return self
+
+    @classmethod
+    def from_buffer(cls,
+                    buffer: TokenBuffer,
+                    index: int = 0,
+                    conf: config.RootConfigCls | None = None, *,
+                    window: bool = True) -> Tokenizer:
+        """Read the tokens of `buffer` from `index` onwards instead of lexing them.
+
+        Tokens are copied out of the buffer as plain `Token`s, so that
+        nothing parsed from them keeps the buffer alive. Token indexes
+        count from `index` as 0.
+        """
+        self = cls(buffer.source, conf, window = window)
+        self._buffer = buffer
+        self._buffer_index = index
+        self.pos = buffer.starts[index] if index < len(buffer) else len(buffer.source)
+        return self
+
+    def _refill(self) -> None:
+        """Drop the text before `pos` and read more of a streamed source.
+
+        At least as much text as is left over gets read, so that a token
+        spanning many chunks doesn't get rescanned once per chunk.
+        """
+        chunks = typing.cast(typing.Iterator[str], self._chunks)
+        dead = self.source[:self.pos]
+        newlines = dead.count("\n")
+        if newlines:
+            self._dropped_lines += newlines
+            self._dropped_line_start = self._source_offset + dead.rfind("\n") + 1
+        self._source_offset += self.pos
+        parts = [self.source[self.pos:]]
+        read = 0
+        while read < max(self._chunk_size, self.STREAM_LOOKAHEAD, len(parts[0])):
+            chunk = next(chunks, None)
+            if chunk is None:
+                self._chunks = None
+                break
+            parts.append(chunk)
+            read += len(chunk)
+        self.source = "".join(parts)
+        self.pos = 0
+        self._line_starts = None
+        self._ascii_end = -1
+
+    def _scan_streamed_token(self) -> tuple[ITTTypeChecking | StrToken, int]:
+        # $ Keep some lookahead for patterns that look past the end of their token, or that
+        # $ only fail (so that a later alternative wins) a few characters in, like '0x'
+        if self._chunks is not None and len(self.source) - self.pos < self.STREAM_LOOKAHEAD:
+            self._refill()
+        while True:
+            start = self.pos
+            try:
+                result = self._scan_token()
+            except errors.IncompleteInputError:
+                # ^ e.g. a string whose closing quote hasn't been read yet
+                # ! Not any syntax error, more input can't make an invalid character valid
+                if self._chunks is None:
+                    raise
+                self.pos = start
+                self._refill()
+                continue
+            if self._chunks is not None and self.pos >= len(self.source):
+                # ^ The token (or a comment before it) might go on in the next chunk
+                self.pos = start
+                self._refill()
+                continue
+            return result
 
     def _multiline_comment(self):
-        multiline_comment = self.conf.customization.comments.multiline_comment
-        if multiline_comment.enabled.get():
-            if self.src.startswith(multiline_comment.syntax.start.get()):
-                self.src = self.src[2:]
-                nest = 1
-                while self.src and nest > 0:
-                    if self.src.startswith(multiline_comment.syntax.start.get()):
-                        nest += 1
-                        self.src = self.src[2:]
-                    elif self.src.startswith(multiline_comment.syntax.end.get()):
-                        nest -= 1
-                        self.src = self.src[2:]
-                    else:
-                        self.src = self.src[1:]
+        if self._comment_delimiters is None:
+            return
+        start, end = self._comment_delimiters
+        source = self.source
+        if not source.startswith(start, self.pos):
+            return
+        pos = self.pos + len(start)
+        if start == end:
+            # ? Identical delimiters can't nest
+            close = source.find(end, pos)
+            self.pos = len(source) if close == -1 else close + len(end)
+            return
+        # $ Jump between delimiter occurrences, each one is only searched for again once it's passed
+        nest = 1
+        next_start = source.find(start, pos)
+        next_end = source.find(end, pos)
+        while nest > 0:
+            if next_end == -1:
+                # ^ Unterminated, the comment runs until the end of the source
+                pos = len(source)
+                break
+            if next_start != -1 and next_start <= next_end:
+                nest += 1
+                pos = next_start + len(start)
+                next_start = source.find(start, pos)
+                if next_end < pos:
+                    next_end = source.find(end, pos)
+            else:
+                nest -= 1
+                pos = next_end + len(end)
+                next_end = source.find(end, pos)
+                if next_start != -1 and next_start < pos:
+                    next_start = source.find(start, pos)
+        self.pos = pos
 
-    def _lex_token(self) -> Token:
-        if not self.src:
-            return Token(InternalTokenType.EoF)
+    def _scan_token(self) -> tuple[ITTTypeChecking | StrToken, int]:
+        """Move past the next token and return its type and start offset.
+
+        String tokens are returned whole in place of the type.
+        """
+        if self.pos >= len(self.source):
+            return InternalTokenType.EoF, self.pos
         
         self._multiline_comment()
+        if self.pos >= len(self.source):
+            return InternalTokenType.EoF, self.pos
         
+        start = self.pos
         f = self._parse_str()
         if f is not None:
-            return f
+            return f, start
+
+        # ^ Operators, keywords and other plain-text patterns
+        plain = self.pattern_table.plains.longest_match(self.source, self.pos)
+        if plain is not None:
+            self.pos += len(plain.pattern)
+            return typing.cast(ITTTypeChecking, plain.kind), start
 
         # ^ Everything else
-        for token_pattern in self.token_patterns:
-            if isinstance(token_pattern, RegExTokenPattern):
-                assert isinstance(token_pattern.pattern, regex.Pattern)
-                if m := token_pattern.pattern.match(self.src):
-                    return self._emit_token(
-                        match = m.group(),
-                        token_type = self.resolve_itt_tuple(token_pattern.associated_type)
-                    )
-            elif isinstance(token_pattern, StringTokenPattern):
-                assert isinstance(token_pattern.pattern, str)
-                if self.src.startswith(token_pattern.pattern):
-                    return self._emit_token(
-                        match = token_pattern.pattern,
-                        token_type = self.resolve_itt_tuple(token_pattern.associated_type)
-                    )
-            else:
-                raise errors.InternalError(
-                    f"Invalid value found in token_patterns ({token_pattern})"
-                )
+        # $ A single match against the alternation of every regex pattern
+        m = self._ascii_match()
+        if m is None:
+            m = self.pattern_table.scanner.match(self.source, self.pos)
+        if m is None:
+            raise errors.SyntaxError(f"Invalid character found: U+{ord(self.source[self.pos]):x}")
+        token_pattern = self.pattern_table.regexes_by_group[typing.cast(str, m.lastgroup)]
+        self.pos = m.end()
+        return typing.cast(ITTTypeChecking, token_pattern.kind), start
+
+    def _ascii_match(self) -> re.Match | regex.Match | None:
+        """Match the regex patterns with the stdlib `re` scanner, if the text allows it.
+
+        The two scanners only differ on non-ASCII letters, which only the
+        identifier pattern looks for. So a match that stops before the
+        next non-ASCII character is the one the Unicode-aware scanner
+        would find, and anything else (including no match) is left to it.
+        """
+        ascii_scanner = self.pattern_table.ascii_scanner
+        if ascii_scanner is None:
+            return None
+        if self._ascii_end < self.pos:
+            non_ascii = NON_ASCII_REGEX.search(self.source, self.pos)
+            self._ascii_end = len(self.source) if non_ascii is None else non_ascii.start()
+        if self._ascii_end == self.pos:
+            return None
+        m = ascii_scanner.match(self.source, self.pos)
+        if m is not None and (m.end() < self._ascii_end or self._ascii_end == len(self.source)):
+            return m
+        return None
+
+    def _lex_token(self) -> Token:
+        if self._buffer is not None:
+            return self._read_buffered()
+        if self._chunks is not None:
+            kind, start = self._scan_streamed_token()
+        else:
+            kind, start = self._scan_token()
+        if isinstance(kind, StrToken):
+            kind.start += self._source_offset
+            return kind
+        value = self.source[start:self.pos]
+        if kind in INTERNED_KINDS:
+            value = sys.intern(value)
+        return Token(kind, value, self._source_offset + start)
+
+    def _read_buffered(self) -> Token:
+        buffer = typing.cast(TokenBuffer, self._buffer)
+        i = self._buffer_index
+        # ? Past the end, EoF keeps being read, like lexing keeps returning it
+        if i < len(buffer) - 1:
+            self._buffer_index += 1
+        self.pos = buffer.ends[i]
+        tok = buffer[i]
+        if isinstance(tok, StrToken):
+            return tok
+        return Token(tok.type, tok.value, tok.start)
+
+    def tokenize_bulk(self) -> TokenBuffer:
+        """Tokenize the rest of the source (up to and including EoF) into a `TokenBuffer`.
+
+        No `Token` objects are created here, only kinds and offsets.
+        """
+        buffer = TokenBuffer(self.source)
+        skip = InternalTokenType._SkipPattern
+        eof = InternalTokenType.EoF
+        while True:
+            kind, start = self._scan_token()
+            if kind is skip:
+                continue
+            buffer.append(kind, start, self.pos)
+            if kind is eof:
+                return buffer
+
+    @classmethod
+    def relex(cls,
+              previous: TokenBuffer,
+              offset: int,
+              removed: int,
+              inserted: str,
+              conf: config.RootConfigCls | None = None) -> TokenBuffer:
+        """Re-tokenize `previous` after replacing `removed` characters at `offset` with `inserted`.
+
+        See `relex_changes()`.
+        """
+        return cls.relex_changes(previous, offset, removed, inserted, conf).tokens
+
+    @classmethod
+    def relex_changes(cls,
+                      previous: TokenBuffer,
+                      offset: int,
+                      removed: int,
+                      inserted: str,
+                      conf: config.RootConfigCls | None = None) -> Relexed:
+        """Re-tokenize `previous` after an edit, like `relex()`, also telling which tokens changed.
+
+        Lexing restarts a few tokens before the edit (a plain pattern like
+        `but what about if` can span several of the old tokens) and stops
+        as soon as a new token starts where an old token after the edit
+        started. From there on, the source is unchanged, so the rest of
+        the old tokens are reused with their offsets moved. Strings and
+        multiline comments need no special care, since strings are single
+        tokens and tokens never start inside of a comment.
+        """
+        old_source = previous.source
+        if offset < 0 or removed < 0 or offset + removed > len(old_source):
+            raise errors.InternalError(
+                f"Edit ({offset}, {removed}) is out of range for a source of length {len(old_source)}"
+            )
+        source = old_source[:offset] + inserted + old_source[offset + removed:]
+        delta = len(inserted) - removed
+        edit_end = offset + len(inserted)
+        self = cls(source, conf)
+
+        # ~ Restart at the start of an old token, which is where the old lexer was in a clean state
+        first = bisect.bisect_left(previous.ends, offset) - self.pattern_table.max_words
+        if first > 0:
+            buffer = previous.head(source, first)
+            self.pos = previous.starts[first]
         else:
-            raise errors.SyntaxError(f"Invalid character found: U+{ord(self.src):x}")
-
-    @staticmethod
-    def resolve_itt_tuple(tple: tuple[str, ...]) -> InternalTokenType:
-        match tple:
-            case (name, ):
-                return getattr(InternalTokenType, name)
-            case ("Symbols", name):
-                return getattr(InternalTokenType.Symbols, name)
-            case ("Keywords", name):
-                return getattr(InternalTokenType.Keywords, name)
-            case ("Parentheses", name):
-                return getattr(InternalTokenType.Parentheses, name)
-            case ("Primitives", name):
-                return getattr(InternalTokenType.Primitives, name)
-            case ("Templates", category, name):
-                return getattr(
-                    getattr(
-                        getattr(InternalTokenType, "Templates"),
-                        category
-                    ),
-                    name
-                )
-            case _:
-                raise errors.InternalError(
-                    "反恐打击非法你的卡覅哦啊就是覅加覅哦按实际覅怕佛都叫哦阿斯顿覅哦啊冰淇淋"
-                )
+            # ! Not starts[0], a comment before the first token might have been edited
+            first = 0
+            buffer = TokenBuffer(source)
+
+        old_starts = previous.starts
+        skip = InternalTokenType._SkipPattern
+        eof = InternalTokenType.EoF
+        while True:
+            kind, start = self._scan_token()
+            if kind is skip:
+                continue
+            if start >= edit_end:
+                # ^ Resynchronized with the old stream
+                i = bisect.bisect_left(old_starts, start - delta, first)
+                if i < len(old_starts) and old_starts[i] == start - delta:
+                    buffer.extend_from(previous, i, delta)
+                    return Relexed(buffer, first, i)
+            buffer.append(kind, start, self.pos)
+            if kind is eof:
+                return Relexed(buffer, first, len(previous))
+
+    resolve_itt_tuple = staticmethod(resolve_itt_tuple)
 
     def peek(self, offset: int = 0) -> Token:
-        while self.token_index + offset >= len(self.tokens):
+        while self.token_index - self._base + offset >= len(self.tokens):
             tok = self._lex_token()
             if tok.type == InternalTokenType._SkipPattern:
                 continue
             self.tokens.append(tok)
             if tok.type == InternalTokenType.EoF:
                 break
-        return self.tokens[self.token_index + offset]
+        return self.tokens[self.token_index - self._base + offset]
     
     def advance(self, 
                 tok_types: TokenTypeSequence | None = None, 
@@ -146,6 +443,8 @@ class Tokenizer(StringSubLexer):
                     )
                 raise error
         self.token_index += 1
+        if self._window and self.token_index - self._base >= self.WINDOW_SLACK:
+            self._trim()
         return tok
     
     def advance_matchings(self, tok_types: TokenTypeSequence = []):
@@ -158,19 +457,106 @@ class Tokenizer(StringSubLexer):
             a.append(self.advance())
         return a
     
+    def _get_line_starts(self) -> list[int]:
+        # ? Relative to `source`, whose first line might have started before it when streaming
+        if self._line_starts is None:
+            self._line_starts = [0, *(m.end() for m in regex.finditer("\n", self.source))]
+        return self._line_starts
+
+    def line_col(self, offset: int) -> tuple[int, int]:
+        """Return the (1-based) line and column of `offset` in the source."""
+        line_starts = self._get_line_starts()
+        i = max(bisect.bisect_right(line_starts, offset - self._source_offset), 1)
+        line_start = self._source_offset + line_starts[i - 1] if i > 1 else self._dropped_line_start
+        return self._dropped_lines + i, offset - line_start + 1
+
+    def line_text(self, line: int) -> str:
+        """Return the text of a (1-based) line, without the line break.
+
+        When streaming, only the part of the line that's still buffered.
+        """
+        line_starts = self._get_line_starts()
+        i = line - self._dropped_lines
+        if not 0 < i <= len(line_starts):
+            return ""
+        start = line_starts[i - 1]
+        end = line_starts[i] - 1 if i < len(line_starts) else len(self.source)
+        return self.source[start:end]
+
+    def current_offset(self) -> int:
+        """Return where the next token starts, or where lexing stopped if it isn't lexed yet."""
+        i = self.token_index - self._base
+        if i < len(self.tokens):
+            return self.tokens[i].start
+        return self._source_offset + self.pos
+
     def remaining(self) -> str:
-        return self.src[:]
+        return self.source[self.pos:]
     
     def consumed(self) -> str:
-        return self.source.removesuffix(self.remaining())
+        return self.source[:self.pos]
 
     def save(self) -> int:
+        """Pin the current position and return it as a checkpoint for `load()`.
+
+        Tokens from a pinned position onwards are kept until the
+        checkpoint is given back with `release()`.
+        """
+        self._pins[self.token_index] = self._pins.get(self.token_index, 0) + 1
         return self.token_index
     
-    def load(self, new_index) -> None:
+    def load(self, new_index: int) -> None:
+        if new_index < self._base:
+            raise errors.InternalError(
+                f"Token checkpoint {new_index} has already been dropped from the token window "
+                f"(oldest kept token: {self._base}). Checkpoints must stay pinned until "
+                "they're released."
+            )
         self.token_index = new_index
 
-    def dump_all(self) -> list[Token]:
+    def release(self, checkpoint: int) -> None:
+        """Unpin a checkpoint returned by `save()`."""
+        count = self._pins.get(checkpoint, 0)
+        if count <= 1:
+            self._pins.pop(checkpoint, None)
+        else:
+            self._pins[checkpoint] = count - 1
+
+    def has_checkpoints(self) -> bool:
+        """Whether any `save()` checkpoint is still pinned, i.e. whether parsing is speculative."""
+        return bool(self._pins)
+
+    def release_all(self) -> None:
+        """Unpin every checkpoint, for when everything that was being parsed has been given up on."""
+        self._pins.clear()
+
+    def skip_character(self) -> None:
+        """Move lexing past the character that it raised an error at.
+
+        Only valid when every lexed token has been consumed, as lexing
+        resumes right after the character.
+        """
+        if self.token_index - self._base != len(self.tokens):
+            raise errors.InternalError("Can only skip a character once every lexed token has been consumed")
+        self.pos += 1
+
+    def oldest_kept(self) -> int:
+        """The index of the oldest token still in the window, positions before it can't be loaded."""
+        return self._base
+
+    def _trim(self) -> None:
+        # ~ Drop every token before the current one and the oldest pinned checkpoint
+        keep_from = min(self.token_index, *self._pins) if self._pins else self.token_index
+        dead = keep_from - self._base
+        if dead > 0:
+            del typing.cast(list[Token], self.tokens)[:dead]
+            self._base = keep_from
+
+    def dump_all(self) -> list[Token] | TokenBuffer:
+        """Advance to EoF and return the token stream.
+
+        On a windowed tokenizer, that's only the tokens still in the window.
+        """
         while self.peek().type != InternalTokenType.EoF:
             self.advance()
         return self.tokens
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""Keeps the generated `lexer.internal_token_types` and `lexer.token_types` up to date.
+
+Both files start with a hash of everything they're generated from (the
+alias tables, which already reflect the config, and the generators
+themselves), and are only regenerated when that hash changes. If the
+files can't be written (read-only deployments), the freshly generated
+modules are loaded from memory instead.
+"""
+
+import hashlib
+import importlib.util
+import os
+import pathlib
+import sys
+import tempfile
+
+from backend import paths
+from lexer.data.aliases import ALIASES
+from lexer.meta import itt, token_types
+
+HASH_HEADER = "# Inputs hash: "
+
+def _inputs_hash() -> str:
+    h = hashlib.sha256(repr(ALIASES).encode("utf-8"))
+    for generator in (itt, token_types):
+        h.update(pathlib.Path(generator.__file__).read_bytes())
+    return h.hexdigest()
+
+# $ Also part of the key of anything that stores token kinds as ints
+INPUTS_HASH = _inputs_hash()
+
+_GENERATED = (
+    ("lexer.internal_token_types", paths.INTERNAL_TOKEN_TYPES, itt),
+    ("lexer.token_types", paths.TOKEN_TYPES, token_types),
+)
+
+def _is_current(path: pathlib.Path) -> bool:
+    try:
+        with open(path, encoding = "utf-8") as f:
+            return f.readline().rstrip("\n") == HASH_HEADER + INPUTS_HASH
+    except OSError:
+        return False
+
+def _load_from_memory(name: str, path: pathlib.Path, source: str) -> None:
+    spec = importlib.util.spec_from_loader(name, loader = None, origin = str(path))
+    assert spec is not None
+    module = importlib.util.module_from_spec(spec)
+    module.__file__ = str(path)
+    sys.modules[name] = module
+    exec(compile(source, str(path), "exec"), module.__dict__)
+
+def _write_atomically(path: pathlib.Path, source: str) -> None:
+    # $ Written aside then moved in place, so that a concurrent import never sees half a module
+    fd, temp = tempfile.mkstemp(dir = path.parent, suffix = ".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding = "utf-8") as f:
+            f.write(source)
+        # ? mkstemp() creates files that only their owner can read
+        os.chmod(temp, 0o644)
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+def ensure_generated() -> None:
+    for name, path, generator in _GENERATED:
+        if _is_current(path):
+            continue
+        source = f"{HASH_HEADER}{INPUTS_HASH}\n{generator.render()}"
+        try:
+            _write_atomically(path, source)
+        except OSError:
+            _load_from_memory(name, path, source)
@@ -75,8 +75,9 @@ async def write_class() -> list[str]:
     lines: list[str] = [
         "\nclass InternalTokenType(ITTTypeChecking):"
     ]
+    # $ Sorted, so that the same aliases always generate the same enum values
     (uncategorized, symbols, keywords, 
-     parentheses, primitives, template_dict) = organize(get_all_itt_used())
+     parentheses, primitives, template_dict) = organize(sorted(get_all_itt_used()))
     tasks = [
         asyncio.create_task(write_subclass("Parentheses", parentheses)),
         asyncio.create_task(write_subclass("Symbols", symbols)),
@@ -87,7 +88,7 @@ async def write_class() -> list[str]:
 
     results = asyncio.gather(*tasks)
 
-    for i in set(uncategorized) | {"EoF", "_SkipPattern"}:
+    for i in sorted(set(uncategorized) | {"EoF", "_SkipPattern"}):
         lines.append(f"    {i} = enum.auto()")
     
     await results
@@ -97,7 +98,7 @@ async def write_class() -> list[str]:
 
     return lines
 
-def write_file():
+def render() -> str:
     lines = [
         "# Should be Inteliisense-friendly",
         "# Generated by a bot",
@@ -107,25 +108,20 @@ def write_file():
         "",
         "_global_counter = itertools.count()",
         "",
-        "class ITTTypeChecking(enum.Enum):",
+        "# Members are plain (globally unique) ints, so comparisons and hashing",
+        "# are int comparisons and hashing, and TokenType aliases compare equal",
+        "class ITTTypeChecking(int, enum.Enum):",
         "    @staticmethod",
         "    def _generate_next_value_(name, start, count, last_values):",
         "        return next(_global_counter)",
-        "    def __eq__(self, other):",
-        "        from lexer.token_types import TokenTypeEnum",
-        "        if isinstance(other, TokenTypeEnum):",
-        "            return self == other.value",
-        "        return super().__eq__(other)",
-        "    def __ne__(self, other):",
-        "        from lexer.token_types import TokenTypeEnum",
-        "        if isinstance(other, TokenTypeEnum):",
-        "            return self != other.value",
-        "        return super().__ne__(other)",
     ]
 
+    lines += asyncio.run(write_class())
+    return "\n".join(lines)
+
+def write_file():
     with open(INTERNAL_TOKEN_TYPES, "w", encoding = "utf-8") as f:
-        lines += asyncio.run(write_class())
-        f.write("\n".join(lines))
+        f.write(render())
 
 if __name__ == "__main__":
     write_file()
\ No newline at end of file
@@ -12,16 +12,28 @@ from lexer.data.aliases import ALIASES
 def resolve_enum(node):
     return f"InternalTokenType.{".".join(node)}"
 
+def collect_leaves(node) -> list[str]:
+    if isinstance(node, dict):
+        leaves = []
+        for v in node.values():
+            leaves += [i for i in collect_leaves(v) if i not in leaves]
+        return leaves
+    if isinstance(node, (tuple, list)):
+        return [resolve_enum(node)]
+    return [f"InternalTokenType.{node}"]
+
 def write_class(name, node, indent = 0):
     lines = []
     pad = " " * indent
     if isinstance(node, dict):
         lines.append("")
         lines.append(f"{pad}class {name}(TokenTypeEnum):")
+        # $ Every token type in this class and its nested classes, for hash-based membership tests
+        leaves = collect_leaves(node)
+        lines.append(f"{pad}    ALL = enum.nonmember(frozenset({{{", ".join(leaves)}}}))"
+                     if leaves else f"{pad}    ALL = enum.nonmember(frozenset())")
         for k, v in node.items():
             lines += write_class(k, v, indent + 4)
-        if not node:
-            lines.append(f"{pad}    pass")
     elif isinstance(node, (tuple, list)):
         lines.append(f"{pad}{name} = {resolve_enum(node)}")
     elif isinstance(node, str):
@@ -55,22 +67,17 @@ def write_all_array(variables) -> list[str]:
     lines.append("]")
     return lines
 
-def write_file():
+def render() -> str:
     lines = [
         "# Auto-generated token_types.py for IntelliSense",
         "# Beep bop",
         "from lexer.internal_token_types import InternalTokenType, ITTTypeChecking",
-        "import enum", 
+        "import enum",
+        "import typing",
         "",
-        "class TokenTypeEnum(enum.Enum):",
-        "    def __eq__(self, other):",
-        "        if isinstance(other, ITTTypeChecking):",
-        "            return self.value == other",
-        "        return super().__eq__(other)",
-        "    def __ne__(self, other):",
-        "        if isinstance(other, ITTTypeChecking):",
-        "            return self.value != other",
-        "        return super().__ne__(other)",
+        "# Same ints as the internal token types, so the two compare (and hash) equal",
+        "class TokenTypeEnum(int, enum.Enum):",
+        "    ALL: typing.ClassVar[frozenset[int]]",
     ]
     
     lines += write_class(CLASS_NAME, ALIASES)
@@ -79,9 +86,11 @@ def write_file():
     lines += l
     lines.append("")
     lines += write_all_array(variables)
+    return "\n".join(lines)
 
+def write_file():
     with open(TOKEN_TYPES, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
+        f.write(render())
 
 if __name__ == "__main__":
     write_file()
\ No newline at end of file
@@ -1,20 +1,91 @@
 from __future__ import annotations
+import re
 from backend import errors
 from backend.config import RootConfigCls, StringLiteralsConfigCls
 from lexer.token_types import TokenTypeEnum
 from lexer.internal_token_types import InternalTokenType, ITTTypeChecking
 from lexer.data.patterns import IDENTIFIER_REGEX
+
+_SIMPLE_ESCAPES = {
+    '"': "\"", "'": "\'", "`": "`",
+    "n": "\n", "t": "\t", "r": "\r",
+    "b": "\b", "f": "\f", "v": "\v",
+    "a": "\a", "\\": "\\", "\n": ""
+}
+_ESCAPE_REGEX = re.compile(r"""\\(?:
+    (?P<simple>["'`ntrbfva\\\n])
+    | (?P<octal>[0-7]{1,3})
+    | x(?P<hex>[0-9a-fA-F]{2})
+    | (?:u(?P<unicode>[0-9a-fA-F]{4}) | U(?P<unicode8>[0-9a-fA-F]{8}))
+    | N\{(?P<name>[^}]*)\}
+)""", re.VERBOSE)
+
+def decode_escapes(content: str) -> str:
+    # $ Strings without a backslash (most of them) are returned as-is
+    backslash = content.find("\\")
+    if backslash == -1:
+        return content
+    res = []
+    i = 0
+    # $ Unescaped runs are copied in one go, only the escapes are decoded
+    while backslash != -1:
+        res.append(content[i:backslash])
+        escape = _ESCAPE_REGEX.match(content, backslash)
+        if escape is None:
+            esc = content[backslash + 1 : backslash + 2]
+            if esc == "x":
+                raise errors.SyntaxError(f"Invalid '\\x' escape (\\x{content[backslash + 2 : backslash + 4]})")
+            elif esc.lower() == "u":
+                length = 4 if esc == "u" else 8
+                raise errors.SyntaxError(
+                    f"Invalid Unicode escape sequence ({content[backslash + 2 : backslash + 2 + length]})"
+                )
+            elif esc == "N":
+                raise errors.SyntaxError(r"Unclosed '\N{' escape")
+            raise errors.SyntaxError(fr"Invalid escape character ('\{esc}')")
+
+        match escape.lastgroup:
+            case "simple":
+                res.append(_SIMPLE_ESCAPES[escape["simple"]])
+            case "octal":
+                ## \o | \oo | \ooo
+                res.append(chr(int(escape["octal"], 8)))
+            case "hex" | "unicode" | "unicode8":
+                ## \xHH | \uXXXX | \UXXXXXXXX
+                res.append(chr(int(escape[escape.lastgroup], 16)))
+            case "name":
+                ## \N{...}
+                import unicodedata
+                name = escape["name"]
+                try:
+                    res.append(unicodedata.lookup(name))
+                except KeyError:
+                    raise errors.SyntaxError(fr"Unable to found the name type in \N (name being ({name}))")
+        i = escape.end()
+        backslash = content.find("\\", i)
+    res.append(content[i:])
+    return "".join(res)
+
 class StringSubLexer:
     _strs_conf: StringLiteralsConfigCls
-    src: str
+    source: str
+    pos: int
+    # $ Precomputed from _strs_conf.get_all_possible_starts(), see TokenPatternTable
+    _string_starts: tuple[str, ...]
+    _string_start_chars: frozenset[str]
     def _parse_str(self) -> StrToken | None:
-        for start in self._strs_conf.get_all_possible_starts():
-            if self.src.startswith(start):
-                location = self.src.find(start[-1], 0, len(start)+1)
-                prefixes = self.src[:location]
-                quote = self.src[location:]
-                self.src.removeprefix(start)
-                return self._parse_str_content(prefixes, quote)
+        if self.source[self.pos] not in self._string_start_chars:
+            return None
+        for start in self._string_starts:
+            if self.source.startswith(start, self.pos):
+                location = start.find(start[-1])
+                prefixes = start[:location]
+                quote = start[location:]
+                offset = self.pos
+                self.pos += len(start)
+                tok = self._parse_str_content(prefixes, quote)
+                tok.start = offset
+                return tok
         return None
 
     def _parse_str_content(self, prefixes: str, quote: str) -> StrToken:
@@ -25,16 +96,29 @@ class StringSubLexer:
             ls.append(i)
         
         interpolation = self._strs_conf.interpolation
-        while self.src.startswith(quote):
-            ...
+        # $ Jump between occurrences of the closing quote
+        # $ A quote preceded by an odd number of backslashes is escaped
+        end = self.pos
+        while True:
+            end = self.source.find(quote, end)
+            if end == -1:
+                raise errors.IncompleteInputError("Unterminated string literal")
+            backslashes = 0
+            while end - backslashes > self.pos and self.source[end - backslashes - 1] == "\\":
+                backslashes += 1
+            if backslashes % 2 == 0:
+                break
+            end += 1
+        ls.append(self.source[self.pos:end])
+        self.pos = end + len(quote)
 
             # # ^ Un-escaped brackets
-            # if self.src.startswith(interpolation.expression_syntax.start.get()):
+            # if self.source.startswith(interpolation.expression_syntax.start.get(), self.pos):
             #     append(self._parse_expr_format_str())
             # # ^ Identifier syntax
             # elif (interpolation.allow_identifier_syntax.get()
-            #       and self.src.startswith(interpolation.identifier_prefix_syntax.get())):
-            #     match = IDENTIFIER_REGEX.match(self.src[1:])
+            #       and self.source.startswith(interpolation.identifier_prefix_syntax.get(), self.pos)):
+            #     match = IDENTIFIER_REGEX.match(self.source, self.pos + 1)
             #     if match:
             #         match.group()
         return StrToken(prefixes, ls)
@@ -44,10 +128,13 @@ class StringSubLexer:
 class Token:
     def __init__(self, 
                  type: TokenTypeEnum | ITTTypeChecking, 
-                 value: str = ""
+                 value: str = "",
+                 start: int = -1
                  ):
         self.type = type
         self.value = value
+        # $ Offset into the source, -1 for tokens that didn't come from one
+        self.start = start
 
     def __str__(self) -> str: return repr(self)
 
@@ -77,6 +164,7 @@ class StrToken(Token):
         self.prefixes = prefixes
         self.ls = ls
         self.value = ""
+        self.start = -1
 
 class FormattedValue:
     def __init__(self, value, 
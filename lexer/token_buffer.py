@@ -0,0 +1,123 @@
+from __future__ import annotations
+import array
+import copy
+import sys
+import typing
+
+from lexer.internal_token_types import InternalTokenType, ITTTypeChecking
+from lexer.strings import Token, StrToken
+
+def _collect_kinds(cls: type[ITTTypeChecking], kinds: dict[int, ITTTypeChecking]) -> dict[int, ITTTypeChecking]:
+    for member in cls:
+        kinds[member.value] = member
+    for subclass in cls.__subclasses__():
+        _collect_kinds(subclass, kinds)
+    return kinds
+
+# $ Every internal token type, keyed by its (globally unique) enum value
+KINDS: dict[int, ITTTypeChecking] = _collect_kinds(ITTTypeChecking, {})
+
+# $ Token types whose lexemes are interned, since they end up as (compared and hashed) names
+INTERNED_KINDS: frozenset[ITTTypeChecking] = frozenset({
+    InternalTokenType.Identifier, *InternalTokenType.Keywords
+})
+
+class BufferedToken(Token):
+    """A token view into a `TokenBuffer`.
+
+    The value is only sliced out of the source when it is asked for.
+    """
+    def __init__(self, buffer: TokenBuffer, index: int):
+        self.type = KINDS[buffer.kinds[index]]
+        self._buffer = buffer
+        self._index = index
+
+    @property
+    def value(self) -> str:
+        buffer = self._buffer
+        value = buffer.source[buffer.starts[self._index]:buffer.ends[self._index]]
+        if self.type in INTERNED_KINDS:
+            value = sys.intern(value)
+        return value
+
+    @property
+    def start(self) -> int:
+        return self._buffer.starts[self._index]
+
+    @property
+    def end(self) -> int:
+        return self._buffer.ends[self._index]
+
+class TokenBuffer:
+    """A token stream stored as parallel arrays.
+
+    `kinds` holds the enum value of each token type, `starts` and `ends`
+    hold offsets into `source`. String tokens carry extra data, so those
+    are kept as-is in `strings`, keyed by their index.
+    """
+    def __init__(self, source: str):
+        self.source = source
+        self.kinds = array.array("H")
+        self.starts = array.array("I")
+        self.ends = array.array("I")
+        self.strings: dict[int, StrToken] = {}
+
+    def append(self, kind: ITTTypeChecking | StrToken, start: int, end: int) -> None:
+        if isinstance(kind, StrToken):
+            self.strings[len(self.kinds)] = kind
+            kind = kind.type
+        self.kinds.append(kind.value)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def head(self, source: str, length: int) -> TokenBuffer:
+        """Copy the first `length` tokens into a new buffer over `source`."""
+        buffer = TokenBuffer(source)
+        buffer.kinds = self.kinds[:length]
+        buffer.starts = self.starts[:length]
+        buffer.ends = self.ends[:length]
+        buffer.strings = {i: s for i, s in self.strings.items() if i < length}
+        return buffer
+
+    def extend_from(self, other: TokenBuffer, index: int, delta: int = 0) -> None:
+        """Append the tokens of `other` from `index` onwards, moving their offsets by `delta`."""
+        shift = len(self.kinds) - index
+        for i, s in other.strings.items():
+            if i >= index:
+                if delta != 0:
+                    s = copy.copy(s)
+                    s.start += delta
+                self.strings[i + shift] = s
+        self.kinds.extend(other.kinds[index:])
+        if delta == 0:
+            self.starts.extend(other.starts[index:])
+            self.ends.extend(other.ends[index:])
+        else:
+            self.starts.extend(array.array("I", map(delta.__add__, other.starts[index:])))
+            self.ends.extend(array.array("I", map(delta.__add__, other.ends[index:])))
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @typing.overload
+    def __getitem__(self, index: int) -> Token: ...
+    @typing.overload
+    def __getitem__(self, index: slice) -> list[Token]: ...
+
+    def __getitem__(self, index: int | slice) -> Token | list[Token]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index in self.strings:
+            return self.strings[index]
+        if not 0 <= index < len(self.kinds):
+            raise IndexError("token index out of range")
+        return BufferedToken(self, index)
+
+    def __iter__(self) -> typing.Iterator[Token]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self) -> str:
+        return f"TokenBuffer({len(self)} tokens)"
@@ -9,7 +9,7 @@ path = pathlib.Path(r"C:\Users\Tien Dung\Dropbox\Script\sapphireFamily\Sapphire\
 
 config_ = config.find_config(path)
 
-from parser.parser import Parser
+from parser import cache
 from interpreter.interpreter import evaluate
 from interpreter.env import Env
 from backend import errors
@@ -17,9 +17,8 @@ from backend import errors
 # ^ Reading the code
 try:
     global_env = Env()
-    with open(path) as file:
-        program_ast = Parser(file.read(), config_).parse_module()
-        evaluate(program_ast, global_env)
+    program_ast = cache.parse_file(path, config_)
+    evaluate(program_ast, global_env)
 # TODO: Came up with a better solution for break/continue/return
 except errors.BreakLoop:
     raise errors.SyntaxError("'break' run outside of a loop")
@@ -0,0 +1,106 @@
+"""An on-disk cache of parsed modules, similar to `__pycache__`.
+
+Each source file gets a `__sapcache__/<name>.sapc` entry next to it, which
+holds the `ModuleNode` parsed from it. An entry is only used if its key
+matches, the key being a hash of:
+- The source file's content
+- The interpreter version (the Python version, the generated token types
+  and the lexer and parser sources, as all of them change the AST)
+- The effective config
+"""
+
+from __future__ import annotations
+import functools
+import hashlib
+import os
+import pathlib
+import pickle
+import sys
+import tempfile
+
+from backend import config, paths
+from lexer import meta
+import parser.nodes as Nodes
+from parser.parser import Parser
+
+CACHE_DIR_NAME = "__sapcache__"
+CACHE_SUFFIX = ".sapc"
+MAGIC = b"SAPC"
+
+# $ The same chunk size as `Tokenizer.from_file()` reads with
+HASH_CHUNK_SIZE = 1 << 16
+
+@functools.cache
+def interpreter_version() -> str:
+    """A hash of everything besides the source and config that the parsed AST depends on."""
+    h = hashlib.sha256(sys.version.encode("utf-8"))
+    h.update(meta.INPUTS_HASH.encode("utf-8"))
+    for folder in (paths.LEXER_FOLDER, paths.PARSER_FOLDER):
+        for file in sorted(folder.rglob("*.py")):
+            h.update(file.relative_to(paths.ROOT).as_posix().encode("utf-8"))
+            h.update(file.read_bytes())
+    return h.hexdigest()
+
+def cache_path(path: str | os.PathLike) -> pathlib.Path:
+    path = pathlib.Path(path)
+    return path.parent/CACHE_DIR_NAME/(path.name + CACHE_SUFFIX)
+
+def cache_key(path: str | os.PathLike, conf: config.RootConfigCls) -> bytes:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            h.update(chunk)
+    h.update(interpreter_version().encode("utf-8"))
+    h.update(repr(conf.fingerprint()).encode("utf-8"))
+    # ? The generated token types follow the global config, not `conf`
+    h.update(repr(config.CONFIG.fingerprint()).encode("utf-8"))
+    return h.digest()
+
+def load(path: str | os.PathLike, key: bytes) -> Nodes.ModuleNode | None:
+    """The cached module of `path`, or None if there's no (up to date) entry."""
+    try:
+        with open(cache_path(path), "rb") as f:
+            if f.read(len(MAGIC) + len(key)) != MAGIC + key:
+                return None
+            module = pickle.load(f)
+    # ? A corrupted or unreadable entry is just a cache miss, and unpickling garbage
+    # ? can raise about anything (ValueError, MemoryError, UnicodeDecodeError...)
+    except Exception:
+        return None
+    if not isinstance(module, Nodes.ModuleNode):
+        return None
+    return module
+
+def store(path: str | os.PathLike, key: bytes, module: Nodes.ModuleNode) -> None:
+    """Write the cache entry of `path`, silently giving up if it can't be written."""
+    target = cache_path(path)
+    try:
+        target.parent.mkdir(exist_ok = True)
+        # $ Written aside then moved in place, so that concurrent runs never see half an entry
+        fd, temp = tempfile.mkstemp(dir = target.parent, suffix = ".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(MAGIC + key)
+                pickle.dump(module, f, protocol = pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, target)
+        except BaseException:
+            os.unlink(temp)
+            raise
+    # ? Like a corrupted entry, an entry that can't be written is just a cache miss, and
+    # ? pickling can fail with more than OSError (RecursionError on deep trees, PicklingError...)
+    except Exception:
+        pass
+
+def parse_file(path: str | os.PathLike, conf: config.RootConfigCls | None = None) -> Nodes.ModuleNode:
+    """Parse the module at `path`, going through its cache entry if there is an up to date one.
+
+    `conf` defaults to the config loaded at the time of the call (`config.CONFIG`).
+    """
+    if conf is None:
+        conf = config.CONFIG
+    key = cache_key(path, conf)
+    module = load(path, key)
+    if module is None:
+        module = Parser.from_file(path, conf).parse_module()
+        store(path, key, module)
+    return module
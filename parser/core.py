@@ -1,30 +1,210 @@
 from abc import ABC, abstractmethod
+import functools
 import typing
 
 from backend import errors
 from lexer import Token, TokenType, Tokenizer, TokenTypeSequence, TokenTypeEnum
-from backend.config import RootConfigCls, CONFIG
+from backend.config import RootConfigCls, CONFIG, option_value
 from lexer.internal_token_types import ITTTypeChecking
 from parser import nodes
 
+# $ Every this many memo entries, those before the token window are purged
+MEMO_PURGE_INTERVAL = 1024
+
+class _MemoEntry(typing.NamedTuple):
+    result: typing.Any
+    error: errors.SapphireError | None
+    end: int
+
+class Diagnostic(typing.NamedTuple):
+    """A syntax error that was recovered from, see `Parser.parse_module_recovering()`."""
+    error: errors.BaseSapphireError
+    line: int
+    column: int
+
+_OPENING_BRACKETS = frozenset({
+    TokenType.Parentheses.OpenParenthesis,
+    TokenType.Parentheses.OpenSquareBracket,
+    TokenType.Parentheses.OpenCurlyBrace,
+})
+_CLOSING_BRACKETS = frozenset({
+    TokenType.Parentheses.CloseParenthesis,
+    TokenType.Parentheses.CloseSquareBracket,
+    TokenType.Parentheses.CloseCurlyBrace,
+})
+
+def memoized[P: "ParserNamespaceSkeleton", **A, R](
+        rule: typing.Callable[typing.Concatenate[P, A], R]
+    ) -> typing.Callable[typing.Concatenate[P, A], R]:
+    """Packrat memoization of a rule that's re-tried after backtracking.
+
+    When the parser has a memo table (`Parser(memoize = True)`), the result
+    of `rule` (or the syntax error it raised) and where it stopped are kept
+    by rule, token index and arguments, so that parsing the same span again
+    is a lookup. Arguments that can't be hashed just bypass the table.
+    """
+    name = rule.__name__
+
+    @functools.wraps(rule)
+    def wrapper(self: P, *args: A.args, **kwargs: A.kwargs) -> R:
+        memo = self._memo
+        if memo is None:
+            return rule(self, *args, **kwargs)
+        tokens = self.tokens
+        key = (name, tokens.token_index, args, tuple(kwargs.items()))
+        try:
+            entry = memo.get(key)
+        except TypeError:
+            return rule(self, *args, **kwargs)
+        if entry is not None:
+            tokens.load(entry.end)
+            if entry.error is not None:
+                raise entry.error.with_traceback(None)
+            return entry.result
+
+        try:
+            result = rule(self, *args, **kwargs)
+        except errors.SapphireError as e:
+            memo[key] = _MemoEntry(None, e, tokens.token_index)
+            raise
+        memo[key] = _MemoEntry(result, None, tokens.token_index)
+        if len(memo) % MEMO_PURGE_INTERVAL == 0:
+            # ? Spans before the window can't be re-parsed anymore
+            oldest = tokens.oldest_kept()
+            for k in [k for k in memo if k[1] < oldest]:
+                del memo[k]
+        return result
+    return wrapper
+
+def statement_separators(conf: RootConfigCls) -> tuple[TokenTypeEnum, ...]:
+    if option_value(conf.customization.uncategorized.semicolon_required):
+        return (TokenType.Symbols.StatementSeparator,)
+    return (TokenType.Symbols.StatementSeparator, TokenType.NewLine)
+
 class ParserNamespaceSkeleton(ABC):
     tokens: Tokenizer
     conf: RootConfigCls
-    _STATEMENT_SEPARATORS: tuple[TokenTypeEnum, ...]
-    if CONFIG.customization.uncategorized.semicolon_required:
-        _STATEMENT_SEPARATORS = (TokenType.Symbols.StatementSeparator,)
-    else:
-        _STATEMENT_SEPARATORS = (TokenType.Symbols.StatementSeparator, TokenType.NewLine)
-
-    @typing.final
-    def __getattribute__(self, attr: str):
-        if super().__getattribute__("__class__").__name__ != "Parser":
+    # $ Packrat memo table, see `memoized()`; None when memoization is off
+    _memo: dict[tuple, _MemoEntry] | None
+    # $ How deep expressions and code blocks currently are nested, see `_enter_nesting()`
+    _nesting: int
+    _max_nesting: int
+    # $ The syntax errors recovered from so far, None unless recovering (see `_parse_separated_stmt()`)
+    _diagnostics: list[Diagnostic] | None
+    # $ From the global config, parsers for other configs are specialized by `parser.parser.parser_class()`
+    _STATEMENT_SEPARATORS: tuple[TokenTypeEnum, ...] = statement_separators(CONFIG)
+
+    # $ Checked once when constructing rather than on every attribute access, which is the hot path
+    def __new__(cls, *args, **kwargs):
+        if cls.__name__ != "Parser":
             raise errors.InternalError(
-                "An attempt to access an attribute from an incomplete parser namespace at " \
+                "An attempt to instantiate an incomplete parser namespace at " \
                 "runtime has been detected. Please use the full 'Parser()' class instead of just " \
                 "poking at an imcomplete stub."
             )
-        return super().__getattribute__(attr)
+        return super().__new__(cls)
+
+    def _enter_nesting(self) -> None:
+        """Go one nesting level deeper, every call must be paired with `_exit_nesting()`.
+
+        Raises a `SyntaxError` (after leaving the level again) past `_max_nesting`.
+        """
+        self._nesting += 1
+        if self._nesting > self._max_nesting:
+            self._nesting -= 1
+            raise errors.SyntaxError(
+                f"Too many nested expressions or code blocks (the limit is {self._max_nesting})"
+            )
+
+    def _exit_nesting(self) -> None:
+        self._nesting -= 1
+
+    def _parse_separated_stmt(self, closing_token: TokenTypeEnum, **context) -> nodes.StmtNode:
+        """Parse a statement of a statement list ended by `closing_token`, and its separator.
+
+        When recovering, a syntax error is recorded as a diagnostic instead
+        of raised, the rest of the statement is skipped (see `_synchronize()`)
+        and an `ErrorNode` takes its place. Speculative parses (while a
+        checkpoint is pinned) still raise, as they might be backtracked.
+        """
+        if self._diagnostics is None or self.tokens.has_checkpoints():
+            stmt = self._parse_stmt(**context)
+            if not self._advance_separators():
+                raise errors.SyntaxError("Expecting a statement separator (; or new line)")
+            return stmt
+
+        start = self.tokens.current_offset()
+        try:
+            # ? Otherwise, the closing token would be skipped along with the statement
+            if self._peek().type == closing_token:
+                raise errors.SyntaxError("Expecting a statement")
+            stmt = self._parse_stmt(**context)
+            if not self._advance_separators():
+                raise errors.SyntaxError("Expecting a statement separator (; or new line)")
+            return stmt
+        # ? Not just `SapphireError`s, a token mismatch without an explicit error is an `InternalError`
+        except errors.BaseSapphireError as e:
+            self._diagnose(e)
+            # ^ Checkpoints of the failed statement that were never released
+            self.tokens.release_all()
+            self._synchronize(closing_token)
+            return nodes.ErrorNode(start, self.tokens.current_offset())
+
+    def _advance_separators(self) -> bool:
+        """Advance past statement separators, returning whether there were any.
+
+        When recovering, characters the lexer fails on are recorded and
+        skipped too, so that the next token can always be peeked at.
+        """
+        if self._diagnostics is None:
+            return bool(self._advance_matchings(self._STATEMENT_SEPARATORS))
+        separated = False
+        while True:
+            try:
+                if self._peek().type not in self._STATEMENT_SEPARATORS:
+                    return separated
+            except errors.SyntaxError as e:
+                self._diagnose(e)
+                self.tokens.skip_character()
+                continue
+            self._advance()
+            separated = True
+
+    def _synchronize(self, closing_token: TokenTypeEnum) -> None:
+        """Skip tokens up to the next statement of the current statement list.
+
+        That's past the next statement separators, or up to (but not past)
+        `closing_token` or EoF, outside of any brackets opened while
+        skipping. Characters the lexer fails on are skipped as well.
+        """
+        depth = 0
+        while True:
+            try:
+                tok_type = self._peek().type
+            except errors.SyntaxError:
+                self.tokens.skip_character()
+                continue
+            if tok_type == TokenType.EoF:
+                return
+            if depth == 0:
+                if tok_type == closing_token:
+                    return
+                if tok_type in self._STATEMENT_SEPARATORS:
+                    self._advance_separators()
+                    return
+            if tok_type in _OPENING_BRACKETS:
+                depth += 1
+            # ? Stray closing brackets are just skipped
+            elif tok_type in _CLOSING_BRACKETS and depth > 0:
+                depth -= 1
+            self._advance()
+
+    def _diagnose(self, error: errors.BaseSapphireError) -> None:
+        line, column = self.tokens.line_col(self.tokens.current_offset())
+        # ? Without its traceback, so that the frames of the failed parse aren't kept alive
+        typing.cast(list[Diagnostic], self._diagnostics).append(
+            Diagnostic(error.with_traceback(None), line, column)
+        )
 
     def _peek(self, offset: int = 0) -> Token:
         return self.tokens.peek(offset)
@@ -37,116 +37,62 @@ for v in BINARY_NODE_DICT.values():
     else:
         BINARY_NODE_DICT["full"].extend(v)
 
-# TODO: Make a dynamic system that allows for custom operator ordering
+# $ The same operators as frozensets, so that matching the current token is a hash lookup
+BINARY_NODE_SETS: dict[str, frozenset[TokenTypeEnum]] = {
+    k: frozenset((v, ) if isinstance(v, TokenTypeEnum) else v)
+    for k, v in BINARY_NODE_DICT.items()
+}
+
+# $ The precedence levels, loosest binding first
+# ? Identity isn't part of it yet, as `is not` is lexed as `is` followed by `not`
+PRECEDENCE_ORDER: tuple[str, ...] = tuple(
+    k for k in BINARY_NODE_DICT if k not in ("full", "identity")
+)
+
+# $ Levels whose operators group from the right, `a ** b ** c` is `a ** (b ** c)`
+RIGHT_ASSOCIATIVE: frozenset[str] = frozenset({"exponentiative"})
+
+def binding_powers(order: typing.Sequence[str]) -> dict[TokenTypeEnum, tuple[int, int]]:
+    """The (left, right) binding powers of the operators in the levels of `order` (loosest first).
+
+    The right power is one above the left one for left associative levels,
+    so that an operator of the same level ends the right operand.
+    """
+    return {
+        oper: (2 * power, 2 * power + (level not in RIGHT_ASSOCIATIVE))
+        for power, level in enumerate(order, start = 1)
+        for oper in BINARY_NODE_SETS[level]
+    }
+
 class InfixBinaryOperations(ParserNamespaceSkeleton):
-    def _binary_parser_factory(self, operator_tokens: TokenTypeSequence,
-                               next_in_precendence: typing.Callable[[], Nodes.ExprNode],
-                               **context):
-        operator_tokens = self._to_token_sequence(operator_tokens)
-        
-        def method(lhs: Nodes.ExprNode | None = None) -> (Nodes.BinaryNode | Nodes.ExprNode):
-                    lhs = next_in_precendence(**context)
-                    if self._peek() in operator_tokens:
-                        return Nodes.BinaryNode(
-                            left = lhs,
-                            oper = self._advance().type,
-                            right = method(**context)
-                        )
-                    return lhs
-        return method
+    # $ The operator ordering is just data, a subclass with another order
+    # $ only has to set `_BINDING_POWERS = binding_powers(order)`
+    _BINDING_POWERS: typing.ClassVar[dict[TokenTypeEnum, tuple[int, int]]] = binding_powers(PRECEDENCE_ORDER)
 
     def _parse_binary_node_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
-        return self._parse_logical_xor_expr(**context)
-
-    def _parse_logical_xor_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
-        return self._binary_parser_factory(
-            operator_tokens = BINARY_NODE_DICT["logical_xor"],
-            next_in_precendence = self._parse_logical_or_expr
-        )(**context)
-    
-    def _parse_logical_or_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
-        return self._binary_parser_factory(
-            operator_tokens = BINARY_NODE_DICT["logical_or"],
-            next_in_precendence = self._parse_logical_and_expr
-        )(**context)
-
-    def _parse_logical_and_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
-        return self._binary_parser_factory(
-            operator_tokens = BINARY_NODE_DICT["logical_and"],
-            next_in_precendence = self._parse_hybrid_xor_expr
-        )(**context)
-
-    def _parse_hybrid_xor_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
-        return self._binary_parser_factory(
-            operator_tokens = BINARY_NODE_DICT["hybrid_xor"],
-            next_in_precendence = self._parse_hybrid_or_expr
-        )(**context)
-    
-    def _parse_hybrid_or_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
-        return self._binary_parser_factory(
-            operator_tokens = BINARY_NODE_DICT["hybrid_or"],
-            next_in_precendence = self._parse_hybrid_and_expr
-        )(**context)
-
-    def _parse_hybrid_and_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
-        return self._binary_parser_factory(
-            operator_tokens = BINARY_NODE_DICT["hybrid_and"],
-            next_in_precendence = self._parse_binary_xor_expr
-        )(**context)
-
-    def _parse_binary_xor_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
-        return self._binary_parser_factory(
-            operator_tokens = BinaryOperators.BinaryXor,
-            next_in_precendence = self._parse_binary_or_expr
-        )(**context)
-    
-    def _parse_binary_or_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
-        return self._binary_parser_factory(
-            operator_tokens = BinaryOperators.BinaryOr,
-            next_in_precendence = self._parse_binary_and_expr
-        )(**context)
-
-    def _parse_binary_and_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
-        return self._binary_parser_factory(
-            operator_tokens = BinaryOperators.BinaryAnd,
-            next_in_precendence = self._parse_spaceship_expr
-        )(**context)
-    
-    def _parse_spaceship_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
-        return self._binary_parser_factory(
-            operator_tokens = BINARY_NODE_DICT["spaceship"],
-            next_in_precendence = self._parse_containing_expr
-        )(**context)
-    
-    def _parse_containing_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
-        return self._binary_parser_factory(
-            operator_tokens = BINARY_NODE_DICT["containing"],
-            next_in_precendence = self._parse_comparison_expr
-        )(**context)
-
-    def _parse_comparison_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
-        return self._binary_parser_factory(
-            operator_tokens = BINARY_NODE_DICT["comparison"],
-            next_in_precendence = self._parse_additive_expr
-        )(**context)
-
-    def _parse_additive_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
-        return self._binary_parser_factory(
-            operator_tokens = BINARY_NODE_DICT["additive"],
-            next_in_precendence = self._parse_multiplicative_expr
-        )(**context)
-    
-    def _parse_multiplicative_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
-        return self._binary_parser_factory(
-            operator_tokens = BINARY_NODE_DICT["multiplicative"],
-            next_in_precendence = self._parse_exponentiative_expr
-        )(**context)
-
-    def _parse_exponentiative_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
-        return self._binary_parser_factory(
-            operator_tokens = BINARY_NODE_DICT["exponentiative"],
-            next_in_precendence = self._parse_unary_expr
-        )(**context)
+        return self._parse_binary_expr(**context)
+
+    def _parse_binary_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
+        """Precedence climbing over `_BINDING_POWERS`.
+
+        Pending operators are kept on an explicit stack rather than the call
+        stack, so long operator chains don't go any deeper.
+        """
+        powers = self._BINDING_POWERS
+        operands = [self._parse_unary_expr(**context)]
+        # $ Pending operators with their right binding power, the tightest on top
+        opers: list[tuple[TokenTypeEnum, int]] = []
+        while (power := powers.get(self._peek().type)) is not None:
+            # $ Pending operators that bind tighter than this one are complete
+            while opers and opers[-1][1] > power[0]:
+                right = operands.pop()
+                operands[-1] = Nodes.BinaryNode(left = operands[-1], oper = opers.pop()[0], right = right)
+            opers.append((self._advance().type, power[1]))
+            operands.append(self._parse_unary_expr(**context))
+        while opers:
+            right = operands.pop()
+            operands[-1] = Nodes.BinaryNode(left = operands[-1], oper = opers.pop()[0], right = right)
+        return operands[0]
 
 class PrefixBinaryOperations(ParserNamespaceSkeleton):
     def _parse_binary_node_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
@@ -156,7 +102,13 @@ class PostfixBinaryOperations(ParserNamespaceSkeleton):
     def _parse_binary_node_expr(self, **context) -> Nodes.BinaryNode | Nodes.ExprNode:
         raise errors.InProgress
 
+BINARY_OPERATIONS: dict[str, type[ParserNamespaceSkeleton]] = {
+    "infix": InfixBinaryOperations,
+    "prefix": PrefixBinaryOperations,
+    "postfix": PostfixBinaryOperations,
+}
 
+# $ The default, parsers for other configs are specialized by `parser.parser.parser_class()`
 match CONFIG.customization.operators.binary_expression_notation.get():
     case "infix":
         BinaryOperations = InfixBinaryOperations
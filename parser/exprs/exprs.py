@@ -23,6 +23,7 @@ from backend.config import CONFIG
 from parser.exprs.sap_collections import Collections
 from parser.exprs.attr_sub_call import AttributeSubcriptionCall
 from parser.exprs.binops import BinaryOperations
+from parser.core import memoized
 
 # ^ The order of precendence, the top being the one that is processed first
 # Note that the last will be called first
@@ -50,8 +51,14 @@ from parser.exprs.binops import BinaryOperations
 
 class Exprs(Collections, BinaryOperations, AttributeSubcriptionCall):
 
+    @memoized
     def _parse_expr(self, **context) -> Nodes.ExprNode:
-        return self._parse_collections_expr(**context)
+        # $ Every nested expression (brackets, parentheses, arguments) goes through here
+        self._enter_nesting()
+        try:
+            return self._parse_collections_expr(**context)
+        finally:
+            self._exit_nesting()
 
     def _parse_walrus_assignment_expr(self, **context) -> Nodes.WalrusNode | Nodes.ExprNode:
         lhs = self._parse_ternary_expr(**context)
@@ -61,7 +68,7 @@ class Exprs(Collections, BinaryOperations, AttributeSubcriptionCall):
         return lhs
     
     def _parse_ternary_expr(self, **context) -> Nodes.TernaryNode | Nodes.ExprNode:
-        cond = self._parse_logical_xor_expr(**context)
+        cond = self._parse_binary_node_expr(**context)
         if self._peek() == TernaryOperators.ConditionSeparator:
             self._advance()
             true_expr = self._parse_expr(**context)
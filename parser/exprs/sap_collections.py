@@ -114,22 +114,15 @@ class Collections(ParserNamespaceSkeleton):
         
         supported_loop_tokens = [TokenType.Statements.Loops.ForLoopFromPython]
         def condition_to_break_loop():
-            if isinstance(closing_token_types, TokenType):
-                return (closing_token_types, *supported_loop_tokens)
-            if isinstance(closing_token_types, list):
-                return closing_token_types + supported_loop_tokens
-            if isinstance(closing_token_types, tuple):
-                return closing_token_types + tuple(supported_loop_tokens)
-            if isinstance(closing_token_types, set):
-                return closing_token_types | set(supported_loop_tokens)
-            else:
-                raise errors.InternalError(f"{type(closing_token_types)} not supported")
+            return (*self._to_token_sequence(closing_token_types), *supported_loop_tokens)
 
         if parsing_fn is None:
             parsing_fn = lambda: self._parse_expr(**context)
         
         self._advance(opening_token_types)
-        if len(elements) != 0:
+        # ? Copied, so that the default list isn't shared between calls
+        elements = list(elements)
+        if len(elements) == 0 and self._peek().type not in self._to_token_sequence(closing_token_types):
             elements.append(parsing_fn())
         while self._peek() == TokenType.Symbols.SequenceElementSeparator:
             self._advance()
@@ -0,0 +1,94 @@
+"""Incremental reparsing of a module after an edit.
+
+An `IncrementalModule` keeps the token buffer of its source along with
+the token span of every top-level statement. After an edit, the tokens
+are re-lexed around it (see `Tokenizer.relex_changes()`) and parsing
+restarts at the statement before the first changed token. It goes on
+until a statement ends where an old statement started, past the changed
+tokens, from where the old statements are reused as they are.
+"""
+
+from __future__ import annotations
+import bisect
+import contextlib
+import typing
+
+from backend import config
+from lexer import Tokenizer, TokenBuffer
+import parser.nodes as Nodes
+from parser.parser import Parser
+
+class IncrementalModule:
+    source: str
+    conf: config.RootConfigCls
+    tokens: TokenBuffer
+    module: Nodes.ModuleNode
+    # $ Statement i spans the tokens [bounds[i], bounds[i + 1]), its separators included
+    # $ The first bound is 0, the leading separators being part of the first statement
+    bounds: list[int]
+    # $ Statement i was parsed from a source where it started shifts[i] characters earlier,
+    # $ which the offsets held by its nodes (token starts and such) are relative to
+    shifts: list[int]
+
+    def __init__(self, source: str, conf: config.RootConfigCls = config.RootConfigCls()):
+        self.source = source
+        self.conf = conf
+        self.tokens = typing.cast(TokenBuffer, Tokenizer(source, conf, bulk = True).tokens)
+        parsed = Nodes.CodeBlockNode()
+        self.bounds = [0]
+        with contextlib.closing(self._parse_from(self.tokens, 0)) as stmts:
+            for stmt, end in stmts:
+                parsed.append(stmt)
+                self.bounds.append(end)
+        self.module = Nodes.ModuleNode(parsed)
+        self.shifts = [0] * len(parsed.body)
+
+    def _parse_from(self, tokens: TokenBuffer, index: int) -> typing.Iterator[tuple[Nodes.StmtNode, int]]:
+        """Parse statements from the token at `index`, along with the index of the token after each one."""
+        parser = Parser("", self.conf)
+        parser.tokens = Tokenizer.from_buffer(tokens, index, self.conf)
+        with contextlib.closing(parser.parse_stmts()) as stmts:
+            for stmt in stmts:
+                yield stmt, index + parser.tokens.token_index
+
+    def edit(self, offset: int, removed: int, inserted: str) -> IncrementalModule:
+        """The module after replacing `removed` characters at `offset` with `inserted`.
+
+        Only the statements the edit touches are parsed again, the others
+        are the very same nodes. This module stays as it is, so it's still
+        valid if the edit raises a syntax error.
+        """
+        relexed = Tokenizer.relex_changes(self.tokens, offset, removed, inserted, self.conf)
+        tokens = relexed.tokens
+        # $ How far the reused tokens (and characters) have moved
+        moved = len(tokens) - len(self.tokens)
+        delta = len(inserted) - removed
+        bounds = self.bounds
+        body = self.module.body.body
+
+        # ~ From the statement before the first changed token, as the changed tokens might
+        # ~ be separators that it ends with
+        first = max(bisect.bisect_left(bounds, relexed.start) - 1, 0)
+        parsed = Nodes.CodeBlockNode()
+        new_bounds = bounds[:first + 1]
+        reused = len(body)
+        with contextlib.closing(self._parse_from(tokens, bounds[first])) as stmts:
+            for stmt, end in stmts:
+                parsed.append(stmt)
+                new_bounds.append(end)
+                if end - moved < relexed.reused:
+                    continue
+                # ^ Past the changed tokens, check if an old statement starts here
+                i = bisect.bisect_left(bounds, end - moved, first)
+                if i < len(body) and bounds[i] == end - moved:
+                    reused = i
+                    break
+
+        new = IncrementalModule.__new__(IncrementalModule)
+        new.source = self.source[:offset] + inserted + self.source[offset + removed:]
+        new.conf = self.conf
+        new.tokens = tokens
+        new.module = Nodes.ModuleNode(Nodes.CodeBlockNode([*body[:first], *parsed.body, *body[reused:]]))
+        new.bounds = new_bounds + [b + moved for b in bounds[reused + 1:]]
+        new.shifts = [*self.shifts[:first], *[0] * len(parsed.body), *[s + delta for s in self.shifts[reused:]]]
+        return new
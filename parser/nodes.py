@@ -39,6 +39,13 @@ class ModuleNode(StmtNode):
     def __iter__(self):
         yield from self.body
 
+@dataclasses.dataclass
+class ErrorNode(StmtNode):
+    # ? A statement that failed to parse and was skipped, see `Parser.parse_module_recovering()`
+    # $ Source offsets of the skipped text, `end` being exclusive
+    start: int
+    end: int
+
 @dataclasses.dataclass
 class VarDeclarationNode(StmtNode):
     idents: list[ExprNode]
@@ -267,17 +274,19 @@ class FormattedStrNode(ExprNode):
 
     @staticmethod
     def convert_from_token(token: StrToken) -> FormattedStrNode | StrNode:
+        from lexer.strings import decode_escapes
         ls = []
         is_format_str = False
+        raw = "r" in token.prefixes.lower()
         for i in token.ls:
             if isinstance(i, str):
-                ls.append(StrNode(i))
+                ls.append(StrNode(i if raw else decode_escapes(i)))
             elif isinstance(i, TokenFV):
                 is_format_str = True
                 ls.append(FormattedValue.convert(i))
             else:
                 typing.assert_never(i)
-        return FormattedStrNode(ls) if is_format_str else StrNode("".join(ls))
+        return FormattedStrNode(ls) if is_format_str else StrNode("".join(node.value for node in ls))
 
 @dataclasses.dataclass
 class FormattedValue(ExprNode):
@@ -1,35 +1,162 @@
+from __future__ import annotations
+import contextlib
+import os
+import sys
+import threading
 import typing
 from lexer import TokenType, Tokenizer
 from backend import config
 import parser.nodes as Nodes
 from backend import errors
+from parser.core import Diagnostic, statement_separators
 from parser.stmts.stmts import Stmts
 from parser.exprs.exprs import Exprs
+from parser.exprs.binops import BINARY_OPERATIONS
+
+# $ The default limit of nested expressions and code blocks
+MAX_NESTING = 1000
+# $ An upper bound of the Python frames a nesting level takes
+FRAMES_PER_NESTING = 16
+
+# $ How many parses currently hold a raised recursion limit, and the limit from before
+_budget_lock = threading.Lock()
+_budget_holders = 0
+_budget_base = 0
+
+@contextlib.contextmanager
+def stack_budget(frames: int) -> typing.Iterator[None]:
+    """Raise the recursion limit by `frames` for the duration of the block.
+
+    The limit is process-wide, so overlapping blocks (interleaved or in
+    other threads) share a single raise: it fits the biggest of them, and
+    the limit is only restored once the last one is done, whatever the
+    order they end in. Blocks must not be held across a `yield`.
+    """
+    global _budget_holders, _budget_base
+    with _budget_lock:
+        if _budget_holders == 0:
+            _budget_base = sys.getrecursionlimit()
+        _budget_holders += 1
+        if sys.getrecursionlimit() < _budget_base + frames:
+            sys.setrecursionlimit(_budget_base + frames)
+    try:
+        yield
+    finally:
+        with _budget_lock:
+            _budget_holders -= 1
+            if _budget_holders == 0:
+                sys.setrecursionlimit(_budget_base)
+
+# $ Specialized parser classes, keyed by config fingerprint
+_PARSER_CLASSES: dict[tuple, type[Parser]] = {}
+
+def parser_class(conf: config.RootConfigCls) -> type[Parser]:
+    """The (cached) `Parser` subclass specialized for `conf`.
+
+    Everything the parser derives from the config is set as class
+    attributes (or mixins) here rather than from the global config at
+    import time, so files with different configs can be parsed in the same
+    process.
+    """
+    key = conf.fingerprint()
+    cls = _PARSER_CLASSES.get(key)
+    if cls is None:
+        bases: tuple[type, ...] = (Parser,)
+        binary_operations = BINARY_OPERATIONS[
+            config.option_value(conf.customization.operators.binary_expression_notation)
+        ]
+        if not issubclass(Parser, binary_operations):
+            bases = (binary_operations, Parser)
+        # ? Named 'Parser' too, see `ParserNamespaceSkeleton.__new__()`
+        cls = _PARSER_CLASSES[key] = typing.cast(type[Parser], type("Parser", bases, {
+            "__module__": __name__,
+            "_STATEMENT_SEPARATORS": statement_separators(conf),
+        }))
+    return cls
 
 class Parser(Stmts, Exprs):
-    def __init__(self, source: str, conf: config.RootConfigCls = config.RootConfigCls()):
+    def __new__(cls, source: str = "", conf: config.RootConfigCls = config.RootConfigCls(), **kwargs):
+        # $ Constructing a plain Parser gives an instance of the class specialized for `conf`
+        if cls is Parser:
+            cls = parser_class(conf)
+        return super().__new__(cls)
+
+    def __init__(self, source: str, conf: config.RootConfigCls = config.RootConfigCls(), *,
+                 memoize: bool = False, max_nesting: int = MAX_NESTING):
         self.source = source
         self.conf = conf
-        self.tokens: Tokenizer = Tokenizer(self.source, conf)
+        # $ Opt-in, it only pays off on inputs that backtrack a lot
+        self._memo = {} if memoize else None
+        self._nesting = 0
+        self._diagnostics = None
+        self._max_nesting = max_nesting
+        # $ Windowed, so that tokens are dropped once they're consumed and no longer pinned
+        self.tokens: Tokenizer = Tokenizer(self.source, conf, window = True)
+
+    @classmethod
+    def from_file(cls, path: str | os.PathLike, conf: config.RootConfigCls = config.RootConfigCls(), *,
+                  memoize: bool = False, max_nesting: int = MAX_NESTING) -> Parser:
+        """A parser that streams its source from `path`, see `Tokenizer.from_file()`."""
+        self = cls("", conf, memoize = memoize, max_nesting = max_nesting)
+        self.tokens = Tokenizer.from_file(path, conf)
+        return self
+
+    def _stack_budget(self) -> contextlib.AbstractContextManager[None]:
+        """Enough recursion limit for `_max_nesting` levels, see `stack_budget()`.
+
+        Nesting past the limit is a `SyntaxError` rather than a `RecursionError` this way.
+        """
+        return stack_budget(self._max_nesting * FRAMES_PER_NESTING)
 
     def parse_module(self) -> Nodes.ModuleNode:
         program = Nodes.ModuleNode()
+        for stmt in self.parse_stmts():
+            try:
+                program.body.append(stmt)
+            except errors.BaseSapphireError as e:
+                raise self._add_position(e)
+        return program
+
+    def parse_module_recovering(self) -> tuple[Nodes.ModuleNode, list[Diagnostic]]:
+        """Parse the module, reporting every syntax error instead of stopping at the first one.
+
+        Statements that fail to parse are replaced by an `ErrorNode` and
+        parsing goes on from the next statement (of the same code block),
+        so the module is partial if there are any diagnostics.
+        """
+        self._diagnostics = []
         try:
-            self._advance_matchings(self._STATEMENT_SEPARATORS)
-            while self._peek().type != TokenType.EoF:
-                program.body.append(self._parse_stmt())
-                if not self._advance_matchings(self._STATEMENT_SEPARATORS):
-                    raise errors.SyntaxError("Expecting a statement separator (; or new line)")
-            return program
+            return self.parse_module(), self._diagnostics
+        finally:
+            self._diagnostics = None
+
+    def parse_stmts(self) -> typing.Iterator[Nodes.StmtNode]:
+        """Parse the top-level statements one at a time, up to EoF.
+
+        Whenever a statement is yielded, the tokenizer is at the start of
+        the next one (its separators having been consumed).
+        """
+        # ? The recursion limit is only raised while parsing, never while suspended
+        try:
+            with self._stack_budget():
+                self._advance_separators()
+            while True:
+                with self._stack_budget():
+                    if self._peek().type == TokenType.EoF:
+                        return
+                    stmt = self._parse_separated_stmt(TokenType.EoF)
+                yield stmt
         except StopIteration:
             raise errors.InternalError(
                 "The lexer has been exhausted prematurely but the "
                 "parser doesn't seems to handle it properly"
             )
         except errors.BaseSapphireError as e:
-            # Debugging purposes
-            e.add_note(f"Remaining:\n{self.tokens.remaining()}")
-            e.add_note(f"Current token: {self._peek().type}")
-            e.add_note(f"Current token stream:\n{self.tokens.tokens}")
-            e.add_note(f"Current program:\n{program.body.body}")
-            raise e
\ No newline at end of file
+            raise self._add_position(e)
+
+    def _add_position[E: errors.BaseSapphireError](self, e: E) -> E:
+        # ? Positions are only computed here, tokens just carry their start offset
+        line, column = self.tokens.line_col(self.tokens.current_offset())
+        e.add_note(f"At line {line}, column {column}:")
+        e.add_note(f"    {self.tokens.line_text(line)}\n    {" " * (column - 1)}^")
+        return e
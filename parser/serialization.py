@@ -0,0 +1,365 @@
+"""A compact binary encoding of ASTs.
+
+Layout (every integer being an unsigned LEB128 varint):
+- `MAGIC` and `VERSION`
+- The string table: a count, then each string as its UTF-8 length and bytes.
+  Every identifier, literal, attribute and class name is stored only once
+- The kind table: a count, then for each kind the string index of its
+  module and qualified name, whether it's a named tuple and the string
+  indexes of its fields
+- The enum table: a count, then for each member the string index of its
+  class' module, qualified name and the member name
+- The root value, see the `Tag` enum for how each value is encoded
+
+Enum members are stored by name rather than by value, so that a dump stays
+valid when the token types are regenerated.
+
+Classes are only ever looked up in a fixed registry (see `registry()`):
+the AST node classes, the string token classes and the enums that nodes
+hold. A dump can't make the loader import or call anything else.
+"""
+
+from __future__ import annotations
+import enum
+import functools
+import mmap
+import os
+import struct
+import typing
+
+from backend import errors
+from lexer.internal_token_types import ITTTypeChecking
+from lexer.strings import Token, StrToken, FormattedValue
+from lexer.token_buffer import BufferedToken
+from lexer.token_types import TokenTypeEnum
+import parser.nodes as Nodes
+
+MAGIC = b"SAPB"
+VERSION = 1
+
+_DOUBLE = struct.Struct("<d")
+
+class Tag(enum.IntEnum):
+    Null = 0
+    False_ = 1
+    True_ = 2
+    # ? Zigzag encoded, so that small negative ints stay small
+    Int = 3
+    # ? 8 bytes, little endian
+    Float = 4
+    # ? String table index
+    Str = 5
+    # ? Length, then the items
+    List = 6
+    Tuple = 7
+    # ? Length, then the keys and values interleaved
+    Dict = 8
+    # ? Kind table index, then the fields in the kind's order
+    Object = 9
+    # ? Enum table index
+    Enum = 10
+    # ? Enum table index of the type, string table index of the value, then the (zigzag) start
+    Token = 11
+
+def _with_subclasses(cls: type) -> typing.Iterator[type]:
+    yield cls
+    for subclass in cls.__subclasses__():
+        yield from _with_subclasses(subclass)
+
+@functools.cache
+def registry() -> dict[tuple[str, str], type]:
+    """Every class that can be (de)serialized, keyed by module and qualified name."""
+    classes: list[type] = [StrToken, FormattedValue]
+    for obj in vars(Nodes).values():
+        if not isinstance(obj, type) or obj.__module__ != Nodes.__name__:
+            continue
+        if issubclass(obj, (Nodes.BaseASTNode, enum.Enum)) or (issubclass(obj, tuple) and hasattr(obj, "_fields")):
+            classes.append(obj)
+    # ? Token types are nested enums, the nested ones are their subclasses
+    classes.extend(_with_subclasses(ITTTypeChecking))
+    classes.extend(_with_subclasses(TokenTypeEnum))
+    return {(cls.__module__, cls.__qualname__): cls for cls in classes}
+
+class _Writer:
+    def __init__(self):
+        self.out = bytearray()
+        self.strings: dict[str, int] = {}
+        self.kinds: dict[tuple[type, tuple[str, ...]], int] = {}
+        self.kind_table: list[tuple[int, int, bool, list[int]]] = []
+        self.enums: dict[enum.Enum, int] = {}
+        self.enum_table: list[tuple[int, int, int]] = []
+
+    def varint(self, out: bytearray, n: int) -> None:
+        while n > 0x7F:
+            out.append((n & 0x7F) | 0x80)
+            n >>= 7
+        out.append(n)
+
+    def string(self, s: str) -> int:
+        index = self.strings.get(s)
+        if index is None:
+            index = self.strings[s] = len(self.strings)
+        return index
+
+    def kind(self, cls: type, fields: tuple[str, ...], is_tuple: bool) -> int:
+        index = self.kinds.get((cls, fields))
+        if index is None:
+            if registry().get((cls.__module__, cls.__qualname__)) is not cls:
+                raise errors.InternalError(f"Cannot serialize a value of type {cls.__name__!r}")
+            index = self.kinds[(cls, fields)] = len(self.kind_table)
+            self.kind_table.append((
+                self.string(cls.__module__), self.string(cls.__qualname__),
+                is_tuple, [self.string(f) for f in fields]
+            ))
+        return index
+
+    def enum(self, member: enum.Enum) -> int:
+        index = self.enums.get(member)
+        if index is None:
+            index = self.enums[member] = len(self.enum_table)
+            cls = type(member)
+            if registry().get((cls.__module__, cls.__qualname__)) is not cls:
+                raise errors.InternalError(f"Cannot serialize a value of type {cls.__name__!r}")
+            self.enum_table.append((
+                self.string(cls.__module__), self.string(cls.__qualname__), self.string(member.name)
+            ))
+        return index
+
+    def value(self, root: typing.Any) -> None:
+        out = self.out
+        varint = self.varint
+        # $ Values left to write, last first, so that nesting depth doesn't turn into Python recursion
+        stack = [root]
+        while stack:
+            value = stack.pop()
+            # ^ bool and enums first, as they're also ints
+            if value is None:
+                out.append(Tag.Null)
+            elif value is True:
+                out.append(Tag.True_)
+            elif value is False:
+                out.append(Tag.False_)
+            elif isinstance(value, enum.Enum):
+                out.append(Tag.Enum)
+                varint(out, self.enum(value))
+            elif type(value) is int:
+                out.append(Tag.Int)
+                varint(out, value << 1 if value >= 0 else (~value << 1) | 1)
+            elif type(value) is float:
+                out.append(Tag.Float)
+                out += _DOUBLE.pack(value)
+            elif type(value) is str:
+                out.append(Tag.Str)
+                varint(out, self.string(value))
+            elif type(value) is list:
+                out.append(Tag.List)
+                varint(out, len(value))
+                stack.extend(reversed(value))
+            elif type(value) is tuple:
+                out.append(Tag.Tuple)
+                varint(out, len(value))
+                stack.extend(reversed(value))
+            elif type(value) is dict:
+                out.append(Tag.Dict)
+                varint(out, len(value))
+                for k, v in reversed(value.items()):
+                    stack.append(v)
+                    stack.append(k)
+            # ? Buffered tokens are views into the lexer, they're stored as plain tokens
+            elif type(value) is Token or type(value) is BufferedToken:
+                out.append(Tag.Token)
+                varint(out, self.enum(value.type))
+                varint(out, self.string(value.value))
+                varint(out, value.start << 1 if value.start >= 0 else (~value.start << 1) | 1)
+            elif isinstance(value, tuple) and hasattr(value, "_fields"):
+                out.append(Tag.Object)
+                varint(out, self.kind(type(value), value._fields, True))
+                stack.extend(reversed(value))
+            elif hasattr(value, "__dict__"):
+                attrs = vars(value)
+                out.append(Tag.Object)
+                varint(out, self.kind(type(value), tuple(attrs), False))
+                stack.extend(reversed(attrs.values()))
+            else:
+                raise errors.InternalError(f"Cannot serialize a value of type {type(value).__name__!r}")
+
+    def finish(self) -> bytes:
+        out = bytearray(MAGIC)
+        varint = self.varint
+        varint(out, VERSION)
+        varint(out, len(self.strings))
+        for s in self.strings:
+            encoded = s.encode("utf-8", "surrogatepass")
+            varint(out, len(encoded))
+            out += encoded
+        varint(out, len(self.kind_table))
+        for module, qualname, is_tuple, fields in self.kind_table:
+            varint(out, module)
+            varint(out, qualname)
+            out.append(is_tuple)
+            varint(out, len(fields))
+            for f in fields:
+                varint(out, f)
+        varint(out, len(self.enum_table))
+        for entry in self.enum_table:
+            for i in entry:
+                varint(out, i)
+        out += self.out
+        return bytes(out)
+
+def dump(node: Nodes.BaseASTNode) -> bytes:
+    """Encode `node` (and everything it holds)."""
+    writer = _Writer()
+    writer.value(node)
+    return writer.finish()
+
+def dump_file(node: Nodes.BaseASTNode, path: str | os.PathLike) -> None:
+    with open(path, "wb") as f:
+        f.write(dump(node))
+
+def _resolve(module: str, qualname: str, base: type) -> typing.Any:
+    """The registered class `module.qualname`, which must be a subclass of `base`."""
+    cls = registry().get((module, qualname))
+    if not isinstance(cls, type) or not issubclass(cls, base):
+        raise errors.InternalError(f"Refusing to load {module}.{qualname}, it's not a serializable class")
+    return cls
+
+def load(data: bytes | bytearray | memoryview | mmap.mmap) -> typing.Any:
+    """Decode what `dump()` encoded.
+
+    `data` is only read through a memoryview, so an mmap is never copied as
+    a whole, only the strings are decoded out of it.
+    """
+    view = memoryview(data)
+    if view[:len(MAGIC)] != MAGIC:
+        raise errors.InternalError("Not a serialized AST")
+    pos = len(MAGIC)
+
+    def varint() -> int:
+        nonlocal pos
+        byte = view[pos]
+        pos += 1
+        if byte < 0x80:
+            return byte
+        n = byte & 0x7F
+        shift = 7
+        while True:
+            byte = view[pos]
+            pos += 1
+            n |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return n
+            shift += 7
+
+    try:
+        if (version := varint()) != VERSION:
+            raise errors.InternalError(f"Unsupported serialization version {version}")
+
+        strings: list[str] = []
+        for _ in range(varint()):
+            length = varint()
+            strings.append(str(view[pos:pos + length], "utf-8", "surrogatepass"))
+            pos += length
+
+        kinds: list[tuple[typing.Any, bool, list[str]]] = []
+        for _ in range(varint()):
+            module, qualname = strings[varint()], strings[varint()]
+            is_tuple = bool(view[pos])
+            pos += 1
+            # ? Named tuples are built from their fields, anything else gets its state set
+            cls = _resolve(module, qualname, tuple if is_tuple else object)
+            if is_tuple != (issubclass(cls, tuple) and hasattr(cls, "_fields")) or issubclass(cls, enum.Enum):
+                raise errors.InternalError(f"Refusing to load {module}.{qualname}, it doesn't match its encoding")
+            kinds.append((cls, is_tuple, [strings[varint()] for _ in range(varint())]))
+
+        enums: list[enum.Enum] = []
+        for _ in range(varint()):
+            cls = _resolve(strings[varint()], strings[varint()], enum.Enum)
+            enums.append(cls[strings[varint()]])
+        view_len = len(view)
+
+        # $ Tags as plain ints, comparing against enum members is several times slower
+        OBJECT, ENUM, STR, LIST = Tag.Object.value, Tag.Enum.value, Tag.Str.value, Tag.List.value
+        INT, FLOAT, NULL, FALSE = Tag.Int.value, Tag.Float.value, Tag.Null.value, Tag.False_.value
+        TRUE, TUPLE, DICT, TOKEN = Tag.True_.value, Tag.Tuple.value, Tag.Dict.value, Tag.Token.value
+
+        # ~ Containers are read with an explicit stack rather than recursively, so deep ASTs (or
+        # ~ payloads) can't exhaust the Python stack. `items` collects the values of the innermost
+        # ~ open container, each frame on the stack holds an outer one until it's complete
+        items: list = []
+        stack: list[tuple[int, typing.Any, list, int]] = []
+        while True:
+            while stack and len(items) == stack[-1][3]:
+                tag, kind, parent, _ = stack.pop()
+                if tag == OBJECT:
+                    cls, is_tuple, fields = kind
+                    if is_tuple:
+                        built = cls(*items)
+                    else:
+                        # ? Custom `__init__`s (or singletons) are bypassed, the state is set as-is
+                        built = cls.__new__(cls)
+                        built.__dict__.update(zip(fields, items))
+                elif tag == LIST:
+                    built = items
+                elif tag == TUPLE:
+                    built = tuple(items)
+                else:
+                    built = dict(zip(items[::2], items[1::2]))
+                items = parent
+                items.append(built)
+            if not stack and items:
+                break
+
+            tag = view[pos]
+            pos += 1
+            # ? Ordered by how common each tag is in an AST
+            if tag == OBJECT:
+                kind = kinds[varint()]
+                stack.append((OBJECT, kind, items, len(kind[2])))
+                items = []
+            elif tag == ENUM:
+                items.append(enums[varint()])
+            elif tag == STR:
+                items.append(strings[varint()])
+            elif tag == LIST or tag == TUPLE:
+                stack.append((tag, None, items, varint()))
+                items = []
+            elif tag == INT:
+                n = varint()
+                items.append(~(n >> 1) if n & 1 else n >> 1)
+            elif tag == FLOAT:
+                pos += 8
+                items.append(_DOUBLE.unpack_from(view, pos - 8)[0])
+            elif tag == NULL:
+                items.append(None)
+            elif tag == FALSE:
+                items.append(False)
+            elif tag == TRUE:
+                items.append(True)
+            elif tag == DICT:
+                stack.append((DICT, None, items, 2 * varint()))
+                items = []
+            elif tag == TOKEN:
+                kind = enums[varint()]
+                text = strings[varint()]
+                n = varint()
+                items.append(Token(kind, text, ~(n >> 1) if n & 1 else n >> 1))
+            else:
+                raise errors.InternalError(f"Unknown serialization tag {tag} at offset {pos - 1}")
+
+        if pos != view_len:
+            raise errors.InternalError("Trailing data after the serialized AST")
+        return items[0]
+    except (IndexError, KeyError, TypeError, struct.error, UnicodeDecodeError) as e:
+        raise errors.InternalError("Corrupted serialized AST") from e
+    finally:
+        view.release()
+
+def load_file(path: str | os.PathLike) -> typing.Any:
+    """Decode a file written by `dump_file()`, mapping it instead of reading it."""
+    with open(path, "rb") as f:
+        # ? Empty files can't be mapped
+        if os.fstat(f.fileno()).st_size == 0:
+            raise errors.InternalError("Not a serialized AST")
+        with mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as mm:
+            return load(mm)
@@ -3,7 +3,12 @@ import typing
 from backend import errors
 from lexer import TokenType, Declarations, Parentheses, TokenTypeSequence
 import parser.nodes as Nodes
-from parser.core import ParserNamespaceSkeleton
+from parser.core import ParserNamespaceSkeleton, memoized
+
+_ASSIGNMENT_TOKENS = frozenset({
+    TokenType.Symbols.AssignOper,
+    *TokenType.Symbols.AugmentedAssignOpers.ALL
+})
 
 class DeclarationStatements(ParserNamespaceSkeleton):
     def _parse_fn_declaration(self) -> Nodes.FunctionDeclarationNode:
@@ -72,11 +77,7 @@ class DeclarationStatements(ParserNamespaceSkeleton):
             Nodes.AssignmentNode | Nodes.ModifierAssignmentNode | Nodes.ExprNode
             ):
         start_pos = self.tokens.save()
-        list_of_assignment_tokens = [
-            TokenType.Symbols.AssignOper, 
-            *TokenType.Symbols.AugmentedAssignOpers.Lefty.__members__,
-            *TokenType.Symbols.AugmentedAssignOpers.Righty.__members__
-        ]
+        list_of_assignment_tokens = _ASSIGNMENT_TOKENS
         try:
             # Try parsing LHS with backtracking support
             target_start_pos = self.tokens.save()
@@ -87,6 +88,8 @@ class DeclarationStatements(ParserNamespaceSkeleton):
             except errors.SapphireError:
                 self.tokens.load(target_start_pos)
                 raise errors._Backtrack
+            finally:
+                self.tokens.release(target_start_pos)
 
             # Check assignment type
             next_tok = self._peek()
@@ -109,12 +112,15 @@ class DeclarationStatements(ParserNamespaceSkeleton):
                     except errors.SapphireError:
                         self.tokens.load(chain_pos)
                         break
+                    finally:
+                        self.tokens.release(chain_pos)
                 
+                self.tokens.release(start_pos)
                 value = self._parse_expr(**context)
                 return Nodes.AssignmentNode(targets, value)
             
-            elif next_tok.type in [*TokenType.Symbols.AugmentedAssignOpers.Lefty.__members__,
-                                   *TokenType.Symbols.AugmentedAssignOpers.Righty.__members__]:
+            elif next_tok.type in TokenType.Symbols.AugmentedAssignOpers.ALL:
+                self.tokens.release(start_pos)
                 op = self._advance()
                 value = self._parse_expr(**context)
                 return Nodes.ModifierAssignmentNode(target, op.value, value)
@@ -124,8 +130,10 @@ class DeclarationStatements(ParserNamespaceSkeleton):
         
         except errors._Backtrack:
             self.tokens.load(start_pos)
+            self.tokens.release(start_pos)
             return self._parse_expr(**context)
     
+    @memoized
     def _parse_assignment_pattern(self, ending_tokens: TokenTypeSequence, **context) -> Nodes.ExprNode:
         save_point = self.tokens.save()
         try:
@@ -142,6 +150,8 @@ class DeclarationStatements(ParserNamespaceSkeleton):
         except errors.SapphireError as e:
             self.tokens.load(save_point)
             raise errors._Backtrack from e
+        finally:
+            self.tokens.release(save_point)
     
     def _parse_assignment_pattern_element(self, **context):
         match self._peek().type:
@@ -111,7 +111,24 @@ class Stmts(MatchCaseStatement, LoopStatements, DeclarationStatements):
             allow_single_line_code_blocks = True,
             **context
         ) -> Nodes.CodeBlockNode:
+        self._enter_nesting()
+        try:
+            return self.__parse_code_block_body(
+                opening_token, closing_token, eat_opening_token,
+                eat_closing_token, allow_single_line_code_blocks, **context
+            )
+        finally:
+            self._exit_nesting()
 
+    def __parse_code_block_body(
+            self,
+            opening_token: TokenTypeEnum,
+            closing_token: TokenTypeEnum,
+            eat_opening_token: bool,
+            eat_closing_token: bool,
+            allow_single_line_code_blocks: bool,
+            **context
+        ) -> Nodes.CodeBlockNode:
         code = Nodes.CodeBlockNode()
         # $ If the code block uses {}
         if self._peek().type == opening_token:
@@ -119,13 +136,13 @@ class Stmts(MatchCaseStatement, LoopStatements, DeclarationStatements):
                 self._advance([opening_token])
             
             # Do-while loop
-            self._advance_matchings(self._STATEMENT_SEPARATORS)
+            self._advance_separators()
             while True:
-                code.append(self._parse_stmt(**context))
-                if not self._advance_matchings(self._STATEMENT_SEPARATORS):
-                    raise errors.SyntaxError("Expecting a statement separator (; or new line)")
+                code.append(self._parse_separated_stmt(closing_token, **context))
                 if self._peek().type == closing_token:
                     break
+                if self._peek().type == TokenType.EoF:
+                    raise errors.SyntaxError("The code block is not closed")
             
             if eat_closing_token:
                 self._advance([closing_token])
@@ -36,6 +36,27 @@ from lexer import Tokenizer, Token, TokenType
         Token(TokenType.Identifier, "parent"),
         Token(TokenType.EoF)
     ]),
+    ("f((x))", [
+        Token(TokenType.Identifier, "f"),
+        Token(TokenType.Parentheses.OpenParenthesis),
+        Token(TokenType.Parentheses.OpenParenthesis),
+        Token(TokenType.Identifier, "x"),
+        Token(TokenType.Parentheses.CloseParenthesis),
+        Token(TokenType.Parentheses.CloseParenthesis),
+        Token(TokenType.EoF)
+    ]),
+    ("iffy == if", [
+        Token(TokenType.Identifier, "iffy"),
+        Token(TokenType.Operators.Binary.Equality),
+        Token(TokenType.Statements.Conditional.Condition),
+        Token(TokenType.EoF)
+    ]),
+    ("a /* b /* c */ d */ + e", [
+        Token(TokenType.Identifier, "a"),
+        Token(TokenType.Operators.Binary.Addition),
+        Token(TokenType.Identifier, "e"),
+        Token(TokenType.EoF)
+    ]),
 ])
 def test_token_stream(src: str, expected: list[Token]):
     t = Tokenizer(src)
@@ -43,4 +64,220 @@ def test_token_stream(src: str, expected: list[Token]):
     assert len(toks) == len(expected)
     for e, r in zip(expected, toks):
         assert e.type == r.type
-        assert r.value == r.value
\ No newline at end of file
+        assert r.value == r.value
+
+def test_bulk_token_buffer():
+    src = "let x = foo(1, 'two') + bar.baz ** 3"
+    expected = Tokenizer(src).dump_all()
+    buffer = Tokenizer(src, bulk = True).dump_all()
+    assert len(buffer) == len(expected)
+    for e, r in zip(expected, buffer):
+        assert e.type == r.type
+        assert e.value == r.value
+
+
+def test_token_window():
+    src = " ".join(f"x{i}" for i in range(2000))
+    lexer = Tokenizer(src, window = True)
+    for _ in range(1000):
+        lexer.advance()
+    assert len(lexer.tokens) <= Tokenizer.WINDOW_SLACK + 1
+    checkpoint = lexer.save()
+    for _ in range(Tokenizer.WINDOW_SLACK * 2):
+        lexer.advance()
+    lexer.load(checkpoint)
+    assert lexer.peek().value == "x1000"
+    lexer.release(checkpoint)
+    for _ in range(Tokenizer.WINDOW_SLACK * 2):
+        lexer.advance()
+    assert lexer.peek().value == f"x{1000 + Tokenizer.WINDOW_SLACK * 2}"
+    with pytest.raises(errors.InternalError):
+        lexer.load(checkpoint)
+
+
+@pytest.mark.parametrize("src,offset,removed,inserted", [
+    ("x = iffy + 1", 6, 2, ""),
+    ("x = 1 + 2\ny = 3", 4, 1, "'a' + /* 1 */ 5"),
+    ("a /* b */ c", 2, 0, "/* "),
+    ("# comment\nfoo", 0, 2, ""),
+    ("s = 'abc' + d", 6, 0, "' + '"),
+])
+def test_relex(src: str, offset: int, removed: int, inserted: str):
+    new = src[:offset] + inserted + src[offset + removed:]
+    previous = Tokenizer(src, bulk = True).dump_all()
+    relexed = Tokenizer.relex(previous, offset, removed, inserted)
+    expected = Tokenizer(new, bulk = True).dump_all()
+    assert list(relexed.starts) == list(expected.starts)
+    assert list(relexed.ends) == list(expected.ends)
+    for e, r in zip(expected, relexed):
+        assert e.type == r.type
+        assert e.value == r.value
+
+
+def test_token_type_sets():
+    from lexer.internal_token_types import InternalTokenType
+    lefty = TokenType.Symbols.AugmentedAssignOpers.Lefty
+    assert lefty.Addition == InternalTokenType.Symbols.PlusAndEqual
+    assert hash(lefty.Addition) == hash(InternalTokenType.Symbols.PlusAndEqual)
+    assert InternalTokenType.Symbols.PlusAndEqual in TokenType.Symbols.AugmentedAssignOpers.ALL
+    assert TokenType.Symbols.AssignOper not in TokenType.Symbols.AugmentedAssignOpers.ALL
+    assert "ALL" not in lefty.__members__
+
+
+def test_token_positions():
+    lexer = Tokenizer("a = 'str'\n  + b")
+    toks = lexer.dump_all()
+    assert [t.start for t in toks] == [0, 2, 4, 9, 12, 14, 15]
+    assert lexer.line_col(toks[5].start) == (2, 5)
+    assert lexer.line_text(2) == "  + b"
+
+
+def test_identifiers_are_interned():
+    toks = Tokenizer("some_name = some_name").dump_all()
+    assert toks[0].value is toks[2].value
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_from_file(tmp_path, use_mmap: bool):
+    src = "x = 'a string' /* a /* nested */ comment */ + 0x1F\n# comment\nnamé = 1_000\n"
+    path = tmp_path / "src.sap"
+    path.write_text(src, encoding = "utf-8")
+    lexer = Tokenizer.from_file(path, chunk_size = 3, use_mmap = use_mmap, window = False)
+    toks = lexer.dump_all()
+    expected = Tokenizer(src).dump_all()
+    assert [(t.type, t.value, t.start) for t in toks] == [(t.type, t.value, t.start) for t in expected]
+    assert lexer.line_col(toks[-2].start) == (3, 13)
+
+
+def test_from_file_invalid_character(tmp_path):
+    path = tmp_path / "src.sap"
+    path.write_text("x = 1 $ 2\n" + "y = 'long string'\n" * 10000, encoding = "utf-8")
+    lexer = Tokenizer.from_file(path, chunk_size = 64)
+    with pytest.raises(errors.SyntaxError, match = "Invalid character"):
+        lexer.dump_all()
+    # ? Raised right away, rather than after reading the rest of the file
+    assert len(lexer.source) < 4096
+
+    # ? A string that's only closed chunks later still lexes
+    path.write_text("x = '" + "a" * 5000 + "'\n", encoding = "utf-8")
+    assert Tokenizer.from_file(path, chunk_size = 64).dump_all()[2].ls == ["a" * 5000]
+
+def test_token_pattern_table_cache(tmp_path, monkeypatch):
+    import dataclasses
+    from backend import config
+    from lexer.data import patterns
+
+    def with_literals(conf: config.RootConfigCls, **literals) -> config.RootConfigCls:
+        customization = conf.customization
+        return dataclasses.replace(conf, customization = dataclasses.replace(
+            customization, literals = dataclasses.replace(customization.literals, **literals)
+        ))
+
+    default = config.RootConfigCls()
+    table = patterns.get_token_pattern_table(default)
+    # ? Equal configs share one table, options the lexer doesn't read don't matter
+    assert patterns.get_token_pattern_table(config.RootConfigCls()) is table
+    assert patterns.get_token_pattern_table(config.RootConfigCls.from_dict(
+        {"customization": {"uncategorized": {"semicolon_required": True}}}
+    )) is table
+
+    # ? Configs differing in literals, comments or templates don't
+    nil = with_literals(default, null = config.NullLiteralConfigCls(syntax = config.ConfOptWrapper(default = "nil")))
+    no_comments = config.RootConfigCls.from_dict(
+        {"customization": {"comments": {"multiline_comment": {"enabled": False}}}}
+    )
+    inverted = config.RootConfigCls.from_dict({"templates": {"inverted_comparisons": True}})
+    tables = [patterns.get_token_pattern_table(c) for c in (nil, no_comments, inverted)]
+    assert len({id(t) for t in [table, *tables]}) == 4
+    assert patterns.get_token_pattern_table(nil) is tables[0]
+
+    # ? Reloading the config drops every table
+    monkeypatch.setattr(config, "CONFIG", config.CONFIG)
+    config.find_config(tmp_path/"main.sap")
+    assert patterns._TABLE_CACHE == {}
+    assert patterns.get_token_pattern_table(default) is not table
+
+def test_ascii_fast_path(monkeypatch):
+    import dataclasses
+    import regex
+    import lexer.lexer
+    from lexer.data import patterns
+
+    class Spy:
+        def __init__(self, scanner):
+            self.scanner = scanner
+            self.matches = 0
+        def match(self, *args):
+            self.matches += 1
+            return self.scanner.match(*args)
+
+    def lex(src: str, table: patterns.TokenPatternTable | None = None) -> tuple[list, Spy, Spy | None]:
+        table = table or patterns.get_token_pattern_table(Tokenizer("").conf)
+        unicode = Spy(table.scanner)
+        ascii = Spy(table.ascii_scanner) if table.ascii_scanner is not None else None
+        spied = dataclasses.replace(table, scanner = unicode, ascii_scanner = ascii)
+        monkeypatch.setattr(lexer.lexer, "get_token_pattern_table", lambda conf: spied)
+        toks = [(t.type, t.value, t.start) for t in Tokenizer(src).dump_all()]
+        monkeypatch.undo()
+        assert toks == [(t.type, t.value, t.start) for t in Tokenizer(src).dump_all()]
+        return toks, unicode, ascii
+
+    # ? ASCII text never reaches the Unicode-aware scanner
+    _, unicode, ascii = lex("some_name = other_name + 0x1F * 2.5\n")
+    assert ascii is not None and ascii.matches > 0
+    assert unicode.matches == 0
+
+    # ? Non-ASCII identifiers, or comments with non-ASCII text, fall back to it
+    toks, unicode, _ = lex("namé = 1\n")
+    assert toks[0][1] == "namé" and unicode.matches > 0
+    toks, unicode, _ = lex("x = 1 # héllo\ny = 2\n")
+    assert "héllo" not in str(toks) and unicode.matches > 0
+
+    # ? Patterns `re` can't compile leave no ASCII scanner, everything goes through `regex`
+    upper = patterns.RegExTokenPattern(regex.compile(r"\p{Lu}+"), ("Identifier",))
+    assert patterns.compile_ascii_token_patterns([upper]) is None
+    default = patterns.get_token_pattern_table(Tokenizer("").conf)
+    toks, unicode, ascii = lex("x = 1\n", dataclasses.replace(default, ascii_scanner = None))
+    assert ascii is None and unicode.matches > 0
+
+def test_ensure_generated(tmp_path, monkeypatch):
+    import importlib
+    import sys
+    from lexer import meta
+
+    targets = [
+        (f"lexer._generated_{generator.__name__.rpartition('.')[2]}", tmp_path/f"{i}.py", generator)
+        for i, (_, _, generator) in enumerate(meta._GENERATED)
+    ]
+    monkeypatch.setattr(meta, "_GENERATED", tuple(targets))
+    meta.ensure_generated()
+    assert all(meta._is_current(path) for _, path, _ in targets)
+
+    # ? Up to date files are left alone
+    writes = []
+    write = meta._write_atomically
+    monkeypatch.setattr(meta, "_write_atomically", lambda path, source: writes.append(path) or write(path, source))
+    meta.ensure_generated()
+    assert writes == []
+
+    # ? Any change to what they're generated from rewrites them
+    monkeypatch.setattr(meta, "INPUTS_HASH", "changed")
+    meta.ensure_generated()
+    assert writes == [path for _, path, _ in targets]
+    assert all(path.read_text(encoding = "utf-8").startswith(meta.HASH_HEADER + "changed\n") for path in writes)
+
+    # ? Targets that can't be written are loaded from memory, and still import
+    monkeypatch.setattr(meta, "_GENERATED", tuple(
+        (name, tmp_path/"read-only"/path.name, generator) for name, path, generator in targets
+    ))
+    try:
+        meta.ensure_generated()
+        for name, path, generator in meta._GENERATED:
+            assert not path.exists()
+            module = importlib.import_module(name)
+            assert module is sys.modules[name]
+            assert module.__file__ == str(path)
+        assert sys.modules[targets[1][0]].TokenType.EoF.name == "EoF"
+    finally:
+        for name, _, _ in targets:
+            sys.modules.pop(name, None)
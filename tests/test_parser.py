@@ -37,4 +37,284 @@ def test_parser(src: str, expected: type[errors.SapphireError] | Nodes.BaseASTNo
         with pytest.raises(expected):
             p.parse_module()
     else:
-        assert p.parse_module() == expected
\ No newline at end of file
+        assert p.parse_module() == expected
+
+def test_module_cache(tmp_path, monkeypatch):
+    from parser import cache
+
+    path = tmp_path/"module.sap"
+    path.write_text("x = a + b * 2\ny += 1.5\n", encoding = "utf-8")
+    module = cache.parse_file(path)
+    assert cache.cache_path(path).is_file()
+    assert module == Parser(path.read_text(encoding = "utf-8")).parse_module()
+
+    # ? A warm cache never reaches the parser
+    monkeypatch.setattr(cache.Parser, "from_file", None)
+    assert cache.parse_file(path) == module
+
+    # ? Editing the source invalidates the entry
+    monkeypatch.undo()
+    path.write_text("x = 1\n", encoding = "utf-8")
+    assert cache.parse_file(path) == Parser("x = 1\n").parse_module()
+
+    # ? Corrupted entries (behind an up to date key) are just cache misses
+    import pickle
+    key = cache.cache_key(path, cache.config.RootConfigCls())
+    for payload in (b"I1x\n.", b"\x80\x05X\x02\x00\x00\x00\xff\xfe.", b"\x80", pickle.dumps([1, 2])):
+        cache.cache_path(path).write_bytes(cache.MAGIC + key + payload)
+        assert cache.load(path, key) is None
+        assert cache.parse_file(path) == Parser("x = 1\n").parse_module()
+
+    # ? Failing to write an entry, for whatever reason, doesn't fail the parse
+    def unpicklable(*args, **kwargs):
+        raise RecursionError("maximum recursion depth exceeded while pickling an object")
+    cache.cache_path(path).unlink()
+    monkeypatch.setattr(cache.pickle, "dump", unpicklable)
+    assert cache.parse_file(path) == Parser("x = 1\n").parse_module()
+    assert list(cache.cache_path(path).parent.iterdir()) == []
+    monkeypatch.undo()
+
+    # ? Without a config, the one loaded at the time of the call is used
+    semicolons = cache.config.RootConfigCls.from_dict(
+        {"customization": {"uncategorized": {"semicolon_required": True}}}
+    )
+    monkeypatch.setattr(cache.config, "CONFIG", semicolons)
+    path.write_text("x = 1;", encoding = "utf-8")
+    assert cache.parse_file(path) == Parser("x = 1;", semicolons).parse_module()
+
+
+def test_serialization(tmp_path):
+    from parser import serialization
+
+    module = Parser("x = a + b * 2\ny += -1.5\nz = foo.bar\n").parse_module()
+    module.body.append(Nodes.CallNode(
+        Nodes.IdentifierNode("f"),
+        Nodes.CallArgumentList([Nodes.IntNode(2 ** 80), Nodes.NullNode()], {"k": Nodes.StrNode("é")})
+    ))
+    module.body.append(Nodes.VariablePatternNode(Nodes.WildcardPatternNode(), "x"))
+    data = serialization.dump(module)
+    assert serialization.load(data) == module
+
+    path = tmp_path/"module.sapb"
+    serialization.dump_file(module, path)
+    assert serialization.load_file(path) == module
+
+    with pytest.raises(errors.InternalError):
+        serialization.load(data[:-1])
+
+
+def test_binary_precedence():
+    add, sub, mul, exp = (BinaryOperators.Addition, BinaryOperators.Subtraction,
+                          BinaryOperators.Multiplication, BinaryOperators.Exponentiation)
+    a, b, c, d = (Nodes.IdentifierNode(name) for name in "abcd")
+    assert Parser("a - b + c * d\n").parse_module() == Nodes.ModuleNode(Nodes.CodeBlockNode([
+        Nodes.BinaryNode(Nodes.BinaryNode(a, sub, b), add, Nodes.BinaryNode(c, mul, d))
+    ]))
+    assert Parser("a * b + c\n").parse_module() == Nodes.ModuleNode(Nodes.CodeBlockNode([
+        Nodes.BinaryNode(Nodes.BinaryNode(a, mul, b), add, c)
+    ]))
+    assert Parser("a ** b ** c\n").parse_module() == Nodes.ModuleNode(Nodes.CodeBlockNode([
+        Nodes.BinaryNode(a, exp, Nodes.BinaryNode(b, exp, c))
+    ]))
+
+    # ? A custom ordering is just another binding power table
+    from backend import config
+    from parser.parser import parser_class
+    from parser.exprs.binops import PRECEDENCE_ORDER, binding_powers
+    order = [level for level in PRECEDENCE_ORDER if level != "additive"] + ["additive"]
+    Parser_ = type("Parser", (parser_class(config.RootConfigCls()),), {"_BINDING_POWERS": binding_powers(order)})
+    assert Parser_("a * b + c\n").parse_module() == Nodes.ModuleNode(Nodes.CodeBlockNode([
+        Nodes.BinaryNode(a, mul, Nodes.BinaryNode(b, add, c))
+    ]))
+
+
+def test_memoization():
+    src = "a, b = c = x * y + 1\nz += 2\n" * 1000
+    parser = Parser(src, memoize = True)
+    assert parser.parse_module() == Parser(src).parse_module()
+    # ? Entries before the token window are purged
+    assert len(parser._memo) < 2048
+
+    parser = Parser("x * y + 1\n", memoize = True)
+    start = parser.tokens.save()
+    expr = parser._parse_expr()
+    end = parser.tokens.token_index
+    parser.tokens.load(start)
+    assert parser._parse_expr() is expr
+    assert parser.tokens.token_index == end
+
+
+def test_incomplete_namespace():
+    from parser.stmts.stmts import Stmts
+
+    with pytest.raises(errors.InternalError):
+        Stmts()
+
+@pytest.mark.parametrize("literal, value", [
+    (r'"plain"', "plain"),
+    (r'"a\nb\tc"', "a\nb\tc"),
+    (r'"\x41\101é\U0001F600"', "AAé\U0001F600"),
+    (r'"\N{BULLET}"', "•"),
+    (r'"say \"hi\"\\"', 'say "hi"\\'),
+    (r'"\q"', errors.SyntaxError),
+    (r'"\x4"', errors.SyntaxError),
+])
+def test_string_escapes(literal: str, value: str | type[errors.SapphireError]):
+    p = Parser(f"x = {literal}\n")
+    if isinstance(value, type):
+        with pytest.raises(value):
+            p.parse_module()
+        return
+    stmt = p.parse_module().body.body[0]
+    assert isinstance(stmt, Nodes.AssignmentNode)
+    assert stmt.value == Nodes.StrNode(value)
+
+
+def test_config_dialects():
+    from backend import config
+    from parser.parser import parser_class
+
+    default = config.RootConfigCls()
+    semicolons = config.RootConfigCls.from_dict(
+        {"customization": {"uncategorized": {"semicolon_required": True}}}
+    )
+    assert type(Parser("", default)) is parser_class(default)
+    assert parser_class(semicolons) is not parser_class(default)
+
+    # ? Both dialects, parsed in the same process
+    expected = Parser("x = 1\ny = 2\n", default).parse_module()
+    assert Parser("x = 1; y = 2;", semicolons).parse_module() == expected
+    with pytest.raises(errors.SyntaxError):
+        Parser("x = 1\ny = 2\n", semicolons).parse_module()
+    assert Parser("x = 1\ny = 2\n", default).parse_module() == expected
+
+    # ? Options the lexer reads, set explicitly rather than left to their defaults
+    no_multiline = config.RootConfigCls.from_dict(
+        {"customization": {"comments": {"multiline_comment": {"enabled": False}}}}
+    )
+    assert Parser("x = 1\n", no_multiline).parse_module() == Parser("x = 1\n", default).parse_module()
+    assert Parser("x = 1 /* a */\n", default).parse_module() == Parser("x = 1\n", default).parse_module()
+    with pytest.raises(errors.SyntaxError):
+        Parser("x = 1 /* a */\n", no_multiline).parse_module()
+
+
+def test_deep_nesting():
+    import sys
+
+    limit = sys.getrecursionlimit()
+    deep = "x = " + "[" * 500 + "1" + "]" * 500 + "\n"
+    assert isinstance(Parser(deep).parse_module(), Nodes.ModuleNode)
+    assert sys.getrecursionlimit() == limit
+
+    # ? Long operator chains don't nest at all
+    chain = "x = " + " + ".join(["a"] * 10000) + "\n"
+    assert isinstance(Parser(chain).parse_module(), Nodes.ModuleNode)
+
+    with pytest.raises(errors.SyntaxError):
+        Parser("x = " + "[" * 60 + "1" + "]" * 60 + "\n", max_nesting = 50).parse_module()
+    with pytest.raises(errors.SyntaxError):
+        Parser("if a {\n" * 60 + "x = 1\n" + "}\n" * 60, max_nesting = 50).parse_module()
+
+
+def test_error_recovery():
+    src = "x = 1\ny = )\nif a {\n  z = )\n  w = 2\n}\nv = 1 $ 2\nu = 3\n"
+    module, diagnostics = Parser(src).parse_module_recovering()
+    body = module.body.body
+    assert [type(stmt) for stmt in body] == [
+        Nodes.AssignmentNode, Nodes.ErrorNode, Nodes.ConditionalNode, Nodes.ErrorNode, Nodes.AssignmentNode
+    ]
+    assert isinstance(body[2].code_block.body[0], Nodes.ErrorNode)
+    assert isinstance(body[2].code_block.body[1], Nodes.AssignmentNode)
+    assert [(d.line, d.column) for d in diagnostics] == [(2, 6), (4, 8), (7, 7)]
+    assert "Invalid character" in str(diagnostics[2].error)
+
+    # ? The same source still fails on its first error without recovery
+    with pytest.raises(errors.BaseSapphireError):
+        Parser(src).parse_module()
+    assert Parser("x = 1\n").parse_module_recovering() == (Parser("x = 1\n").parse_module(), [])
+
+
+@pytest.mark.parametrize("offset, removed, inserted", [
+    (4, 1, "2 + 3"),        # ? Inside of the first statement
+    (19, 1, "5"),           # ? Inside of a code block
+    (21, 0, "if b {\n    t = 1\n  }\n"),  # ? A nested block
+    (35, 0, "v = 1\n"),     # ? A new statement
+    (6, 0, "\n\n"),         # ? Separators only
+    (0, 0, "q = 0\n"),
+])
+def test_incremental_reparse(offset: int, removed: int, inserted: str):
+    from parser.incremental import IncrementalModule
+
+    src = "x = 1\nif a {\n  y = 2\n  z = y * 3\n}\nw = [1, 2]\nv = w + 1; u = 2\n"
+    previous = IncrementalModule(src)
+    edited = previous.edit(offset, removed, inserted)
+    assert edited.source == src[:offset] + inserted + src[offset + removed:]
+    assert edited.module == Parser(edited.source).parse_module()
+    assert edited.bounds == IncrementalModule(edited.source).bounds
+    # ? The last statements are untouched by every edit, so they're reused
+    assert edited.module.body.body[-1] is previous.module.body.body[-1]
+    assert edited.shifts[-1] == len(inserted) - removed
+
+
+def test_serialization_only_loads_registered_classes():
+    from parser import serialization
+
+    def kind(module: str, qualname: str, is_tuple: int) -> bytes:
+        # ? One kind taking no fields, and an object of it as the root
+        strings = [module.encode(), qualname.encode()]
+        return (
+            serialization.MAGIC + bytes([serialization.VERSION, len(strings)])
+            + b"".join(bytes([len(s)]) + s for s in strings)
+            + bytes([1, 0, 1, is_tuple, 0, 0, serialization.Tag.Object, 0])
+        )
+
+    assert serialization.load(kind("parser.nodes", "BreakNode", 0)) == Nodes.BreakNode()
+    for module, qualname, is_tuple in [
+        ("os", "system", 1), ("parser.cache", "os.system", 1), ("parser.cache", "os.system", 0),
+        ("parser.nodes", "dataclasses", 0), ("builtins", "object", 0),
+        ("parser.nodes", "ExprContext", 0), ("parser.nodes", "BreakNode", 1),
+    ]:
+        with pytest.raises(errors.InternalError):
+            serialization.load(kind(module, qualname, is_tuple))
+
+
+def test_recursion_limit_restored():
+    import sys
+    import threading
+
+    limit = sys.getrecursionlimit()
+    # ? Interleaved, and closed in the order they were started
+    first = Parser("x = 1\ny = 2\n").parse_stmts()
+    second = Parser("x = 1\ny = 2\n").parse_stmts()
+    next(first)
+    next(second)
+    assert sys.getrecursionlimit() == limit
+    first.close()
+    second.close()
+    assert sys.getrecursionlimit() == limit
+
+    src = "x = " + "[" * 300 + "1" + "]" * 300 + "\n"
+    threads = [threading.Thread(target = lambda: Parser(src).parse_module()) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sys.getrecursionlimit() == limit
+
+
+def test_serialization_deep_ast():
+    from parser import serialization
+
+    module = Parser("x = " + "[" * 900 + "1" + "]" * 900 + "\n").parse_module()
+    data = serialization.dump(module)
+    # ? Compared through their encodings, as `==` on the nodes themselves recurses
+    assert serialization.dump(serialization.load(data)) == data
+
+    # ? Nested containers far deeper than any AST
+    depth = 100_000
+    payload = serialization.MAGIC + bytes([serialization.VERSION, 0, 0, 0])
+    payload += bytes([serialization.Tag.List, 1]) * depth + bytes([serialization.Tag.Null])
+    value = serialization.load(payload)
+    for _ in range(depth):
+        value, = value
+    assert value is None